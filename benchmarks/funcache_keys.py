@@ -0,0 +1,53 @@
+# compares the cache keys of `freeman.utils.funcache.cached`: `make_key` against the JSON keys it replaced.
+# run from the repository root with `python benchmarks/funcache_keys.py`
+import sys
+import json
+import timeit
+import pathlib
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from freeman.utils.funcache import make_key  # noqa: E402
+
+
+def json_key(args, kwargs):
+    return json.dumps({"args": args, "kwargs": kwargs})
+
+
+def query(clauses: int) -> dict:
+    return {
+        "_or": [
+            {
+                "name": {"_icontains": f"name {i}"},
+                "age": {"_gte": i, "_lt": i + 10},
+                "tags": {"_in": ["a", "b", "c", i]},
+            }
+            for i in range(clauses)
+        ],
+        "owner": {"profile": {"city": {"_eq": "Lagos"}}},
+    }
+
+
+def measure(serializer, args, kwargs, number: int) -> float:
+    # a lookup hashes the key, so it's part of the cost
+    timer = timeit.Timer(lambda: hash(serializer(args, kwargs)))
+    return min(timer.repeat(repeat=5, number=number)) / number
+
+
+def main() -> None:
+    cases = {
+        "single criterion": (({"age": {"_eq": 5}},), {}),
+        "nested field": (({"a": {"b": {"c": {"_neq": 5}}}},), {"parent": "x"}),
+        "20 clauses": ((query(20),), {}),
+        "200 clauses": ((query(200),), {}),
+    }
+    print(f"{'case':<20}{'json (us)':>12}{'make_key (us)':>16}{'speedup':>10}")
+    for name, (args, kwargs) in cases.items():
+        number = 20_000 if len(json_key(args, kwargs)) < 1000 else 500
+        before = measure(json_key, args, kwargs, number) * 1e6
+        after = measure(make_key, args, kwargs, number) * 1e6
+        print(f"{name:<20}{before:>12.2f}{after:>16.2f}{before / after:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
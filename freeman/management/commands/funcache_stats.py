@@ -0,0 +1,87 @@
+import json
+import typing
+from django.core.management.base import BaseCommand, CommandParser
+from freeman import settings
+from freeman.utils.funcache import CacheStats, published_stats
+
+
+def _total(values: list[typing.Any]) -> typing.Any:
+    # None when no process could tell
+    known = [value for value in values if value is not None]
+    return sum(known) if known else None
+
+
+def aggregate(
+    published: dict[str, list[CacheStats]],
+) -> dict[str, tuple[CacheStats, int]]:
+    """Adds up the stats of each function across processes, with the number of processes that reported it."""
+    by_name: dict[str, list[CacheStats]] = {}
+    for entries in published.values():
+        for entry in entries:
+            by_name.setdefault(entry.name, []).append(entry)
+
+    totals: dict[str, tuple[CacheStats, int]] = {}
+    for name, entries in sorted(by_name.items()):
+        total = CacheStats(
+            name=name,
+            hits=sum(entry.hits for entry in entries),
+            misses=sum(entry.misses for entry in entries),
+            evictions=_total([entry.evictions for entry in entries]),
+            currsize=_total([entry.currsize for entry in entries]),
+            maxsize=_total([entry.maxsize for entry in entries]),
+            memory=_total([entry.memory for entry in entries]),
+            compute_time=sum(entry.compute_time for entry in entries),
+            time_saved=sum(entry.time_saved for entry in entries),
+        )
+        totals[name] = (total, len(entries))
+    return totals
+
+
+class Command(BaseCommand):
+    help = (
+        "Shows the hits, misses, evictions, size and time saved of the functions cached with freeman's funcache, "
+        "added up across the processes that publish their stats (see FreemanCacheStatsMiddleware)."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--cache",
+            default=settings.FREEMAN_FUNCACHE_STATS_CACHE,
+            help="The alias of the cache the stats are published to.",
+        )
+        parser.add_argument(
+            "--json", action="store_true", help="Output the stats as JSON."
+        )
+
+    def handle(self, *args: typing.Any, **options: typing.Any) -> None:
+        published = published_stats(options["cache"])
+        totals = aggregate(published)
+
+        if options["json"]:
+            self.stdout.write(
+                json.dumps(
+                    {
+                        "processes": len(published),
+                        "functions": [
+                            {**total._asdict(), "processes": processes}
+                            for total, processes in totals.values()
+                        ],
+                    },
+                    indent=2,
+                )
+            )
+            return
+
+        if not totals:
+            self.stdout.write("No stats were published.")
+            return
+
+        self.stdout.write(f"{len(published)} process(es) reporting")
+        for total, processes in totals.values():
+            self.stdout.write(
+                f"{total.name}: {total.hits} hits, {total.misses} misses "
+                f"({total.hit_rate:.0%}), {total.evictions} evictions, "
+                f"{total.currsize}/{total.maxsize} results, {total.memory} bytes, "
+                f"{total.compute_time:.3f}s computing, {total.time_saved:.3f}s saved, "
+                f"over {processes} process(es)"
+            )
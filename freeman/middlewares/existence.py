@@ -0,0 +1,21 @@
+import typing
+from django.http import HttpResponse, HttpRequest
+from freeman.utils.existence import request_scope
+
+
+class FreemanExistenceCacheMiddleware:
+    """
+    Middleware that scopes the values cached by `dto.Model` rules created with `cache=True` to each request.
+
+    Values confirmed to exist while handling a request are not looked up again until the response is returned.
+
+    Args:
+        get_response: A callable that takes an `HttpRequest` object and returns an `HttpResponse`.
+    """
+
+    def __init__(self, get_response: typing.Callable[[HttpRequest], HttpResponse]):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        with request_scope():
+            return self.get_response(request)
@@ -0,0 +1,40 @@
+import time
+import typing
+import threading
+from django.http import HttpResponse, HttpRequest
+from freeman import settings
+from freeman.utils import funcache
+
+
+class FreemanCacheStatsMiddleware:
+    """
+    Middleware that periodically publishes and logs the stats of the functions cached with `funcache.cached`.
+
+    Every `FREEMAN_FUNCACHE_STATS_INTERVAL` seconds, after a response, the stats of the process are stored in the
+    `FREEMAN_FUNCACHE_STATS_CACHE` cache for the `funcache_stats` management command, and logged by the
+    `freeman.utils.funcache` logger.
+
+    Args:
+        get_response: A callable that takes an `HttpRequest` object and returns an `HttpResponse`.
+    """
+
+    def __init__(self, get_response: typing.Callable[[HttpRequest], HttpResponse]):
+        self.get_response = get_response
+        self.interval = settings.FREEMAN_FUNCACHE_STATS_INTERVAL
+        self.next_report = time.monotonic() + self.interval
+        self.lock = threading.Lock()
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        response = self.get_response(request)
+        now = time.monotonic()
+        if now >= self.next_report and self.lock.acquire(blocking=False):
+            try:
+                self.next_report = now + self.interval
+                # kept a few intervals, so a process that stopped drops out of the report
+                funcache.publish_stats(
+                    settings.FREEMAN_FUNCACHE_STATS_CACHE, timeout=self.interval * 3
+                )
+                funcache.log_stats()
+            finally:
+                self.lock.release()
+        return response
@@ -1,7 +1,12 @@
+import json
 import uuid
+import base64
 import typing
+import binascii
 from . import types
-from django.db import models, transaction
+from functools import reduce
+from django.db import DatabaseError, connections, models, transaction
+from django.core.exceptions import FieldDoesNotExist, ValidationError
 from freeman.utils.dsa import DotDict
 
 
@@ -95,6 +100,161 @@ class AbstractSharedModel(models.Model):
             res = res[offset : offset + limit]
         return res
 
+    @classmethod
+    def stream(
+        cls,
+        where: models.Q,
+        chunk_size: int = 2000,
+        fields: typing.Sequence[str] | None = None,
+        keyset: bool = False,
+    ) -> typing.Iterator[typing.Self | tuple[typing.Any, ...]]:
+        """
+        Iterates over the instances of the subclass that match the given query, holding at most `chunk_size` rows
+        in memory, for result sets too large to be cached by a queryset.
+
+        Args:
+            where (models.Q): A query object that specifies the filtering conditions.
+            chunk_size (int): How many rows are fetched from the database at once.
+            fields (Sequence[str] | None): The fields to yield tuples of instead of instances, so no instance is built.
+            keyset (bool): Whether to fetch the rows with one query per chunk, seeking past the primary key of the
+                previous chunk, instead of a single query read with `iterator()`. For databases (or connection
+                poolers) without server-side cursors, where `iterator()` fetches every row at once.
+
+        Returns:
+            Iterator[AbstractSharedModel | tuple]: The instances, or tuples of `fields`, that match the query.
+        """
+        res = cls.all().filter(where)
+        if not keyset:
+            if fields is not None:
+                res = res.values_list(*fields)
+            yield from res.iterator(chunk_size=chunk_size)
+            return
+
+        pk = cls._meta.pk.name
+        res = res.order_by(pk)
+        if fields is not None:
+            # the primary key leads the tuples, to seek past the chunk
+            res = res.values_list(pk, *fields)
+        last = None
+        while True:
+            chunk = res if last is None else res.filter(pk__gt=last)
+            rows = list(chunk[:chunk_size])
+            if fields is None:
+                yield from rows
+            else:
+                yield from (row[1:] for row in rows)
+            if len(rows) < chunk_size:
+                return
+            last = rows[-1].pk if fields is None else rows[-1][0]
+
+    @classmethod
+    def findPage(
+        cls,
+        where: models.Q,
+        limit: int,
+        after: str | None = None,
+        order_by: typing.Sequence[str] = ("date_created", "id"),
+    ) -> types.Page[typing.Self]:
+        """
+        Retrieves a page of the instances of the subclass that match the given query, seeking past the previous page
+        instead of counting the rows before it, so every page costs the same however deep it is.
+
+        The ordering should be served by an index of the subclass, e.g. `models.Index(fields=["date_created", "id"])`,
+        and its fields must not be null. The primary key is appended to it when missing, so it is total.
+
+        Args:
+            where (models.Q): A query object that specifies the filtering conditions.
+            limit (int): The maximum number of instances to retrieve, at least 1.
+            after (str | None): The cursor of the previous page, None for the first page.
+            order_by (Sequence[str]): The fields to order by, prefixed with "-" for a descending order.
+
+        Raises:
+            ValueError: If `limit` is less than 1, `order_by` isn't made of columns of the subclass that can't be null
+                (`author__name` isn't one, `author_id` is), or `after` isn't a cursor of a page with the same ordering.
+
+        Returns:
+            Page: The instances of the page, and the cursor of the next page.
+        """
+        if limit < 1:
+            raise ValueError(f"a page holds at least one instance, not {limit}")
+        order = cls._keyset(order_by)
+        res = cls.all().filter(where)
+        if after is not None:
+            res = res.filter(cls._seek(order, after))
+        names = [f"-{name}" if descending else name for name, descending in order]
+        items = list(res.order_by(*names)[: limit + 1])
+
+        cursor = None
+        if len(items) > limit:
+            del items[limit:]
+            last = items[-1]
+            values = [
+                cls._meta.get_field(name).value_to_string(last) for name, _ in order
+            ]
+            cursor = base64.urlsafe_b64encode(
+                json.dumps([names, values]).encode()
+            ).decode()
+        return types.Page(items, cursor)
+
+    @classmethod
+    def _keyset(cls, order_by: typing.Sequence[str]) -> list[tuple[str, bool]]:
+        # the (field name, descending) of the ordering, made total with the primary key
+        pk = cls._meta.pk.name
+        order = [(name.lstrip("-"), name.startswith("-")) for name in order_by]
+        order = [
+            (pk if name == "pk" else name, descending) for name, descending in order
+        ]
+        for name, _ in order:
+            if "__" in name:
+                raise ValueError(
+                    f"can't order pages by {name!r}, only by fields of {cls.__name__}"
+                )
+            try:
+                field = cls._meta.get_field(name)
+            except FieldDoesNotExist as e:
+                raise ValueError(f"{cls.__name__} has no field {name!r}") from e
+            if (
+                not field.concrete
+                or field.many_to_many
+                or (field.is_relation and name != field.attname)
+            ):
+                # a relation is ordered by the ordering of its model, its column isn't
+                raise ValueError(
+                    f"can't order pages by {name!r}, only by the columns of {cls.__name__}"
+                )
+            if field.null:
+                # NULL compares to no value, the rows holding it would be skipped by the seek
+                raise ValueError(f"can't order pages by {name!r}, it can be null")
+        if pk not in (name for name, _ in order):
+            order.append((pk, False))
+        return order
+
+    @classmethod
+    def _seek(cls, order: list[tuple[str, bool]], after: str) -> models.Q:
+        # the rows after the cursor, in the order of the cursor
+        try:
+            names, values = json.loads(base64.urlsafe_b64decode(after.encode()))
+        except (binascii.Error, UnicodeError, ValueError, TypeError) as e:
+            raise ValueError(f"invalid cursor {after!r}") from e
+        if names != [f"-{name}" if descending else name for name, descending in order]:
+            raise ValueError(f"the cursor {after!r} is of another ordering")
+        try:
+            values = [
+                cls._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(order, values, strict=True)
+            ]
+        except (ValueError, TypeError, ValidationError) as e:
+            raise ValueError(f"invalid cursor {after!r}") from e
+
+        # (a > x) | (a = x & (b > y)) ..., built from the last field
+        seek = None
+        for (name, descending), value in reversed(list(zip(order, values))):
+            past = models.Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+            seek = past if seek is None else past | (models.Q(**{name: value}) & seek)
+        # the leading field's range lets the database seek the index to the cursor
+        (name, descending), value = order[0], values[0]
+        return models.Q(**{f"{name}__{'lte' if descending else 'gte'}": value}) & seek
+
     @classmethod
     def insertSingle(cls, objectData: dict[str, typing.Any]) -> typing.Self:
         """
@@ -126,13 +286,179 @@ class AbstractSharedModel(models.Model):
         return cls.objects.bulk_create(instances)
 
     @classmethod
-    def updateOne(cls, pk: types.Pk, _set: dict[str, typing.Any]) -> typing.Self:
+    def upsertMany(
+        cls,
+        objects: list[dict[str, typing.Any]],
+        unique_fields: typing.Sequence[str],
+        update_fields: typing.Sequence[str] | None = None,
+        batch_size: int | None = None,
+    ) -> types.UpsertResult:
+        """
+        Inserts multiple objects into the database table, updating the rows that already exist instead.
+
+        Uses `bulk_create(update_conflicts=True)` where the database supports it, and otherwise updates the existing
+        rows with `bulk_update` and inserts the others with `bulk_create`. Either way the rows that exist are looked up
+        first, to count them, and the objects are written in groups of the same update fields.
+
+        Args:
+            objects (list[dict[str, typing.Any]]): A list of dictionaries, where each dictionary contains the data for
+                an object. A row that exists only has the update fields its object sets updated, the others keep
+                their value.
+            unique_fields (Sequence[str]): The fields that identify a row, they must be covered by a unique
+                constraint. When objects repeat the same values for them, the last one is written and the others
+                are ignored.
+            update_fields (Sequence[str] | None): The fields to update on the rows that exist, all the fields the
+                objects set but `unique_fields` when None.
+            batch_size (int | None): How many objects are written per query, all at once when None.
+
+        Returns:
+            UpsertResult: The number of rows inserted, and the number of rows updated.
+        """
+        if not objects:
+            return types.UpsertResult(0, 0)
+
+        db = cls.objects.db
+        features = connections[db].features
+        fields = [cls._meta.get_field(name) for name in unique_fields]
+        keys = [
+            tuple(field.to_python(obj[field.name]) for field in fields)
+            for obj in objects
+        ]
+        # the last object of a key is the one written, a row is inserted or updated once
+        last = {key: i for i, key in enumerate(keys)}
+        if len(last) < len(keys):
+            kept = sorted(last.values())
+            objects = [objects[i] for i in kept]
+            keys = [keys[i] for i in kept]
+        if update_fields is None:
+            update_fields = list(
+                dict.fromkeys(
+                    key for obj in objects for key in obj if key not in unique_fields
+                )
+            )
+        # the objects by the update fields they set, a row is only updated with the values of its object
+        groups: dict[tuple[str, ...], list[int]] = {}
+        for i, obj in enumerate(objects):
+            names = tuple(name for name in update_fields if name in obj)
+            groups.setdefault(names, []).append(i)
+
+        with transaction.atomic(using=db):
+            existing = cls._existing(fields, keys)
+            updated = sum(key in existing for key in keys)
+            instances: dict[tuple[typing.Any, ...], typing.Self] | None = None
+
+            for names, indexes in groups.items():
+                group = [objects[i] for i in indexes]
+                if not names and features.supports_ignore_conflicts:
+                    # nothing to update, the rows that exist are left alone
+                    cls.objects.bulk_create(
+                        [cls(**obj) for obj in group],
+                        batch_size=batch_size,
+                        ignore_conflicts=True,
+                    )
+                elif names and features.supports_update_conflicts:
+                    cls.objects.bulk_create(
+                        [cls(**obj) for obj in group],
+                        batch_size=batch_size,
+                        update_conflicts=True,
+                        # only some databases (not MySQL) name the conflicting constraint
+                        unique_fields=(
+                            unique_fields
+                            if features.supports_update_conflicts_with_target
+                            else None
+                        ),
+                        update_fields=names,
+                    )
+                else:
+                    if instances is None:
+                        # loaded once, for the groups that need them
+                        instances = cls._existingRows(
+                            fields, [key for key in keys if key in existing]
+                        )
+                    created: list[typing.Self] = []
+                    changed: list[typing.Self] = []
+                    for i, obj in zip(indexes, group):
+                        instance = instances.get(keys[i])
+                        if instance is None:
+                            created.append(cls(**obj))
+                            continue
+                        for name in names:
+                            setattr(instance, name, obj[name])
+                        changed.append(instance)
+                    cls.objects.bulk_create(created, batch_size=batch_size)
+                    if changed and names:
+                        cls.objects.bulk_update(changed, names, batch_size=batch_size)
+
+        return types.UpsertResult(len(objects) - updated, updated)
+
+    @classmethod
+    def _existing(
+        cls, fields: list[models.Field], keys: list[tuple[typing.Any, ...]]
+    ) -> set[tuple[typing.Any, ...]]:
+        # the keys of the rows that exist, only their columns are read
+        attnames = [field.attname for field in fields]
+        found: set[tuple[typing.Any, ...]] = set()
+        for where in cls._keyFilters(fields, keys):
+            found.update(cls.objects.filter(where).values_list(*attnames))
+        return found
+
+    @classmethod
+    def _existingRows(
+        cls, fields: list[models.Field], keys: list[tuple[typing.Any, ...]]
+    ) -> dict[tuple[typing.Any, ...], typing.Self]:
+        # the rows that exist for the keys, by key
+        existing: dict[tuple[typing.Any, ...], typing.Self] = {}
+        for where in cls._keyFilters(fields, keys):
+            for instance in cls.objects.filter(where):
+                key = tuple(getattr(instance, field.attname) for field in fields)
+                existing[key] = instance
+        return existing
+
+    @classmethod
+    def _keyFilters(
+        cls, fields: list[models.Field], keys: list[tuple[typing.Any, ...]]
+    ) -> typing.Iterator[models.Q]:
+        # the filters of the rows of the keys, in chunks the database can bind the parameters of
+        max_params = connections[cls.objects.db].features.max_query_params
+        size = max_params // len(fields) if max_params else max(len(keys), 1)
+        for start in range(0, len(keys), size):
+            chunk = keys[start : start + size]
+            if len(fields) == 1:
+                yield models.Q(**{f"{fields[0].name}__in": [key[0] for key in chunk]})
+            else:
+                yield reduce(
+                    lambda a, b: a | b,
+                    (
+                        models.Q(
+                            **{field.name: value for field, value in zip(fields, key)}
+                        )
+                        for key in chunk
+                    ),
+                )
+
+    @classmethod
+    def updateOne(
+        cls,
+        pk: types.Pk,
+        _set: dict[str, typing.Any],
+        fast: bool = False,
+        signals: bool = True,
+    ) -> typing.Self:
         """
         Updates a single instance of the subclass that matches the given primary key with the specified fields.
 
+        By default the instance is loaded then saved whole. With `fast`, a single UPDATE of the fields of `_set` is
+        run instead, so the other fields aren't written back over concurrent changes. The instance returned then only
+        holds the primary key and the fields of `_set`, the others are deferred and loaded when accessed. When `_set`
+        sets fields to expressions (e.g. `F("count") + 1`), their new values and the deferred fields are loaded with
+        one more query.
+
         Args:
             pk (Pk): The primary key of the instance to update.
             _set (dict[str, typing.Any]): A dictionary containing the fields to update and their new values.
+            fast (bool): Whether to update the row without loading it first.
+            signals (bool): With `fast`, whether to save the instance with `save(update_fields=...)` so the
+                `pre_save` and `post_save` signals are sent, rather than with a queryset's `update()`.
 
         Returns:
             AbstractSharedModel: The updated instance of the subclass.
@@ -140,13 +466,14 @@ class AbstractSharedModel(models.Model):
         Raises:
             AbstractSharedModel.DoesNotExist: If no instance with the given primary key exists.
         """
+        if fast:
+            return cls._updateRow(pk, _set, signals)
+
         # Get the instance to update
         try:
             instance = cls.objects.get(pk=pk)
         except cls.DoesNotExist:
-            raise AbstractSharedModel.DoesNotExist(
-                f"No {cls.__name__} found with pk={pk}"
-            )
+            raise cls.DoesNotExist(f"No {cls.__name__} found with pk={pk}")
 
         # Update the instance with the given set of fields
         for field, value in _set.items():
@@ -155,6 +482,45 @@ class AbstractSharedModel(models.Model):
 
         return instance
 
+    @classmethod
+    def _updateRow(
+        cls, pk: types.Pk, _set: dict[str, typing.Any], signals: bool
+    ) -> typing.Self:
+        # an instance with all its fields deferred but the primary key and the ones set
+        pk_field = cls._meta.pk
+        instance = cls.from_db(
+            cls.objects.db, [pk_field.attname], [pk_field.to_python(pk)]
+        )
+        # the fields set to expressions (e.g. F("count") + 1) are left deferred, to load their new value
+        values = {
+            field: value
+            for field, value in _set.items()
+            if not hasattr(value, "resolve_expression")
+        }
+
+        if signals:
+            for field, value in _set.items():
+                setattr(instance, field, value)
+            try:
+                instance.save(update_fields=list(_set))
+            except DatabaseError:
+                # raised when the UPDATE matched no row, or by the database
+                if cls.objects.filter(pk=pk).exists():
+                    raise
+                raise cls.DoesNotExist(f"No {cls.__name__} found with pk={pk}")
+            for field in _set.keys() - values.keys():
+                instance.__dict__.pop(cls._meta.get_field(field).attname, None)
+        else:
+            if not cls.objects.filter(pk=pk).update(**_set):
+                raise cls.DoesNotExist(f"No {cls.__name__} found with pk={pk}")
+            for field, value in values.items():
+                setattr(instance, field, value)
+        if len(values) < len(_set):
+            # the values of the expressions are only known to the database. the deferred fields are loaded along,
+            # rather than with one query per field when they're accessed
+            instance.refresh_from_db(fields=instance.get_deferred_fields())
+        return instance
+
     @classmethod
     def updateWhere(cls, where: models.Q, _set: dict[str, typing.Any]) -> int:
         """Updates all the objects with the _set that matches the where query. Returns the number of updated rows.
@@ -171,42 +537,56 @@ class AbstractSharedModel(models.Model):
         return cls.objects.filter(where).update(**_set)
 
     @classmethod
-    def updateMany(cls, objects: list[types.PartialUpdateType]) -> list[typing.Self]:
+    def updateMany(
+        cls, objects: list[types.PartialUpdateType], batch_size: int | None = None
+    ) -> list[typing.Self]:
         """Updates multiple objects with new values atomically. If one of the updates fail, all updates are rolled back.
 
+        The objects are fetched with a single query and saved with `bulk_update`, setting the fields any of the
+        updates touches.
+
         Args:
             objects (list[PartialUpdateType]): A list of dictionaries containing 'pk' and '_set' fields.
+            batch_size (int | None): How many objects are saved per query, all at once when None.
 
         Returns:
             list['AbstractSharedModel']: A list of the updated objects.
-        """
-
-        with transaction.atomic():
-            updated_objects: list[typing.Self] = []
 
-            for obj in objects:
-                pk = obj["pk"]
-                _set = obj["_set"]
-                try:
-                    updated_object = cls.objects.get(pk=pk)
+        Raises:
+            AbstractSharedModel.DoesNotExist: If no instance exists for one of the primary keys.
+        """
+        pk_field = cls._meta.pk
+        pks = [pk_field.to_python(obj["pk"]) for obj in objects]
 
-                    for key, value in _set.items():
-                        setattr(updated_object, key, value)
+        with transaction.atomic(using=cls.objects.db):
+            instances = cls.objects.in_bulk(pks)
+            missing = [pk for pk in pks if pk not in instances]
+            if missing:
+                raise cls.DoesNotExist(f"No {cls.__name__} found with pk={missing[0]}")
 
-                    updated_objects.append(updated_object)
-                except Exception as e:
-                    # Rollback the transaction if an update fails
-                    transaction.set_rollback(True)
-                    raise e
+            fields: dict[str, None] = {}
+            updated_objects: list[typing.Self] = []
+            for pk, obj in zip(pks, objects):
+                updated_object = instances[pk]
+                for key, value in obj["_set"].items():
+                    setattr(updated_object, key, value)
+                    fields[key] = None
+                updated_objects.append(updated_object)
+
+            if fields:
+                cls.objects.bulk_update(
+                    list(instances.values()), list(fields), batch_size=batch_size
+                )
         return updated_objects
 
     @classmethod
-    def deleteOne(cls, pk: types.Pk) -> None:
+    def deleteOne(cls, pk: types.Pk, fast: bool = False) -> None:
         """
         Deletes an instance of the subclass with the given primary key.
 
         Args:
             pk (Pk): The primary key of the instance to delete.
+            fast (bool): Whether to delete the row with a filtered delete, without loading the instance first.
 
         Raises:
             AbstractSharedModel.DoesNotExist: If no instance with the given primary key exists.
@@ -214,6 +594,12 @@ class AbstractSharedModel(models.Model):
         Returns:
             None
         """
+        if fast:
+            _, deleted = cls.objects.filter(pk=pk).delete()
+            if not deleted.get(cls._meta.label):
+                raise cls.DoesNotExist(f"No {cls.__name__} found with pk={pk}")
+            return
+
         instance = cls.objects.get(pk=pk)
         instance.delete()
 
@@ -7,3 +7,17 @@ JSONableType: typing.TypeAlias = int | str | bool | None | dict[str, "JSONableTy
 class PartialUpdateType(typing.TypedDict):
     pk: Pk
     _set: dict[str, typing.Any]
+
+
+ModelType = typing.TypeVar("ModelType")
+
+
+class Page(typing.NamedTuple, typing.Generic[ModelType]):
+    items: list[ModelType]
+    #: the cursor of the next page, to pass as `after`. None on the last page
+    cursor: str | None
+
+
+class UpsertResult(typing.NamedTuple):
+    inserted: int
+    updated: int
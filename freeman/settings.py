@@ -4,3 +4,11 @@ FREEMAN_PICK_PARAM_NAME: str = getattr(settings, "FREEMAN_PICK_PARAM_NAME", "fie
 FREEMAN_ALLOW_MULTIPLE_TOKENS_PER_USER: bool = getattr(
     settings, "FREEMAN_ALLOW_MULTIPLE_TOKENS_PER_USER", False
 )
+# how often, in seconds, FreemanCacheStatsMiddleware publishes and logs the stats of the cached functions
+FREEMAN_FUNCACHE_STATS_INTERVAL: float = getattr(
+    settings, "FREEMAN_FUNCACHE_STATS_INTERVAL", 60
+)
+# the alias of the cache, shared by the processes, the stats are published to
+FREEMAN_FUNCACHE_STATS_CACHE: str = getattr(
+    settings, "FREEMAN_FUNCACHE_STATS_CACHE", "default"
+)
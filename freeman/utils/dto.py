@@ -1,7 +1,399 @@
 # data transfer objects
 import re
+import types
 import typing
-from django.db import models
+import asyncio
+import inspect
+from django.db import connections, models
+from django.core import exceptions
+from . import existence
+
+_Check: typing.TypeAlias = typing.Callable[[typing.Any], None]
+
+# relative costs of the checks a rule runs, rules holding other rules check the cheapest ones first
+_COST_TYPE = 0  # type and nullability guards
+_COST_SCAN = 1  # lengths, ranges and character classes
+_COST_PATTERN = 2  # regular expressions
+_COST_CALL = 3  # custom validators
+_COST_QUERY = 4  # database lookups
+
+# the most distinct values `Model` counts the matching records of per query, when the database has to compare them
+_LOOKUP_CHUNK = 100
+# the query parameters `Model` leaves to its filter when it fetches the values matching a chunk of values
+_FILTER_PARAMS = 100
+
+
+# (error code, message template) by (rule type, constraint), rule types are the ones of `Rule.toDict`.
+# the messages are formatted with the name of the offending value, the constraint and the error's parameters
+_ERRORS: dict[tuple[str, str], tuple[str, str]] = {
+    ("string", "type"): ("invalid_type", "{name} is not a valid string"),
+    ("string", "min_length"): (
+        "too_short",
+        "{name} '{value}' is shorter than the minimum length of {min_length}",
+    ),
+    ("string", "max_length"): (
+        "too_long",
+        "{name} '{value}' is longer than the maximum length of {max_length}",
+    ),
+    **{
+        ("string", flag): (
+            "disallowed_characters",
+            "{name} '{value}' contains {kind} characters but {constraint} flag is set to False",
+        )
+        for flag in (
+            "allow_whitespace",
+            "allow_numeric",
+            "allow_special_characters",
+            "allow_uppercase",
+            "allow_lowercase",
+        )
+    },
+    ("string", "pattern"): (
+        "pattern_mismatch",
+        "{name} '{value}' does not match the required pattern",
+    ),
+    ("string", "validators"): (
+        "failed_validation",
+        "{name} '{value}' failed validation",
+    ),
+    ("number", "type"): ("invalid_type", "{name} is not a number value"),
+    ("number", "minimum"): (
+        "too_small",
+        "{name}: {value} is less than the minimum value of {minimum}",
+    ),
+    ("number", "maximum"): (
+        "too_large",
+        "{name}: {value} is greater than the maximum value of {maximum}",
+    ),
+    ("number", "integer_only"): (
+        "not_integer",
+        "{name}: {value} is not an integer but integer_only flag is set to True",
+    ),
+    ("number", "validators"): (
+        "failed_validation",
+        "{name}: {value} failed validation",
+    ),
+    ("boolean", "type"): ("invalid_type", "{name} is not a valid boolean value"),
+    ("dictionary", "type"): ("invalid_type", "{name} is not a dictionary"),
+    ("dictionary", "min_length"): (
+        "too_short",
+        "{name} has {length} key-value pairs, which is less than the minimum of {min_length}",
+    ),
+    ("dictionary", "max_length"): (
+        "too_long",
+        "{name} has {length} key-value pairs, which is more than the maximum of {max_length}",
+    ),
+    ("dictionary", "allow_unknown_keys"): (
+        "unknown_keys",
+        "{name} has unknown keys: {keys}",
+    ),
+    ("list", "type"): ("invalid_type", "{name} is not a list"),
+    ("list", "min_length"): (
+        "too_short",
+        "{name} has {length} elements, which is less than the minimum of {min_length}",
+    ),
+    ("list", "max_length"): (
+        "too_long",
+        "{name} has {length} elements, which is more than the maximum of {max_length}",
+    ),
+    ("any", "rules"): ("no_match", "{name} does not meet any of the provided rules"),
+    ("django.db.models.Model", "field"): (
+        "does_not_exist",
+        "{name} does not match any {model} records in the database",
+    ),
+    ("not-null", "nullable"): ("null", "{name} should not be None."),
+    # the ValueError of a custom rule, see `_wrap`
+    ("custom", "validate"): ("invalid", "{name}{detail}"),
+}
+# every rule but NonNull reports a None value the same way
+_NULL_ERROR = ("null", "{name} is None but nullable flag is set to False")
+# for the errors of custom rules, that aren't in _ERRORS
+_UNKNOWN_ERROR = (
+    "invalid",
+    "{name} does not meet the {constraint} constraint of {rule}",
+)
+
+
+class ValidationError(ValueError):
+    """Raised when a value does not meet a rule.
+
+    Nothing is formatted when the error is raised: the message and the path to the offending value are only rendered
+    when the error is turned into a string. Composite rules record the path while the error propagates, so rules are
+    never mutated during validation and can be shared between threads.
+
+    Attributes:
+        name (str): The name of the rule the validation started from.
+        path (list[str | int]): The dictionary keys and list indexes leading from that rule to the offending value.
+            For the errors of a `StructuredInput`, it starts with the name of the field.
+        field (str | None): The field of the `StructuredInput` the offending value was found under, if any.
+        rule (str): The type of the rule that failed, as in `Rule.toDict`.
+        constraint (str): The option of the rule that failed, e.g. "min_length", "nullable" or "type".
+        code (str): A stable identifier of the failure, e.g. "too_short", "null" or "invalid_type".
+        params (dict[str, Any]): The offending value and the limits involved, used to render the message.
+    """
+
+    def __init__(
+        self, name: str, rule: str, constraint: str, **params: typing.Any
+    ) -> None:
+        # the arguments the error is rebuilt from when unpickled, its other attributes are restored from its __dict__
+        super().__init__(name, rule, constraint)
+        self.name = name
+        self.path: list[str | int] = []
+        self.field: str | None = None
+        self.rule = rule
+        self.constraint = constraint
+        self.code, self.message = _ERRORS.get((rule, constraint)) or (
+            _NULL_ERROR if constraint == "nullable" else _UNKNOWN_ERROR
+        )
+        self.params = params
+
+    def within(self, name: str, *segments: str | int) -> "ValidationError":
+        """Records that the offending value was found under `segments` of the value validated by the rule `name`."""
+        self.name = name
+        self.path[:0] = segments
+        return self
+
+    def within_field(self, field: str) -> "ValidationError":
+        """Records that the offending value was found under the field `field` of a `StructuredInput`. The error is
+        then rendered like `StructuredInput.validate` reports it: "field: message"."""
+        self.field = field
+        self.path.insert(0, field)
+        return self
+
+    @property
+    def location(self) -> str:
+        path = self.path if self.field is None else self.path[1:]
+        return self.name + "".join(
+            f"[{segment}]" if isinstance(segment, int) else f".{segment}"
+            for segment in path
+        )
+
+    def __str__(self) -> str:
+        message = self.message.format(
+            name=self.location,
+            rule=self.rule,
+            constraint=self.constraint,
+            **self.params,
+        )
+        return message if self.field is None else f"{self.field}: {message}"
+
+    def toDict(self) -> dict[str, typing.Any]:
+        """Describes the error without rendering its message, and without the offending value."""
+        return {
+            "path": list(self.path),
+            "rule": self.rule,
+            "constraint": self.constraint,
+            "code": self.code,
+            "params": {
+                key: value for key, value in self.params.items() if key != "value"
+            },
+        }
+
+
+def _wrap(error: ValueError, name: str) -> ValidationError:
+    """Turns the `ValueError` of a custom rule that doesn't raise `ValidationError` into one, so the path to the
+    offending value can be recorded. A message starting with the rule's name is rendered with the path in its place.
+    """
+    if isinstance(error, ValidationError):
+        return error
+    message = str(error)
+    detail = message[len(name) :] if message.startswith(name) else f": {message}"
+    wrapped = ValidationError(name, "custom", "validate", detail=detail)
+    wrapped.__cause__ = error
+    return wrapped
+
+
+def _compile_checks(
+    name: str,
+    rule: str,
+    nullable: bool,
+    types: type | tuple[type, ...],
+    steps: list[_Check],
+) -> _Check:
+    """Builds the check shared by most rules: a nullability guard, a type guard, then
+    only the steps that are enabled on the rule."""
+    steps_ = tuple(steps)
+
+    def check(other: typing.Any) -> None:
+        if other is None:
+            if not nullable:
+                raise ValidationError(name, rule, "nullable")
+        elif not isinstance(other, types):
+            raise ValidationError(name, rule, "type")
+        else:
+            for step in steps_:
+                step(other)
+
+    return check
+
+
+# (flag, kind, test) for every character class a String can disallow, in reporting order
+_CharacterClass: typing.TypeAlias = tuple[str, str, typing.Callable[[str], bool]]
+_CHARACTER_CLASSES: tuple[_CharacterClass, ...] = (
+    ("allow_whitespace", "whitespace", str.isspace),
+    ("allow_numeric", "numeric", str.isnumeric),
+    ("allow_special_characters", "special", lambda c: not c.isalnum()),
+    ("allow_uppercase", "uppercase", str.isupper),
+    ("allow_lowercase", "lowercase", str.islower),
+)
+
+
+class _AllowFlag:
+    """An `allow_*` flag of `String`. Setting it recomputes the character classes the string disallows, so
+    validating doesn't have to."""
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance: typing.Any, owner: type | None = None) -> typing.Any:
+        if instance is None:
+            return self
+        return instance.__dict__.get(self.name, True)
+
+    def __set__(self, instance: typing.Any, value: bool) -> None:
+        instance.__dict__[self.name] = value
+        instance._disallowed = tuple(
+            character_class
+            for character_class in _CHARACTER_CLASSES
+            if not instance.__dict__.get(character_class[0], True)
+        )
+
+
+def _find_disallowed_characters(
+    value: str, classes: tuple[_CharacterClass, ...]
+) -> tuple[str, str] | None:
+    """Returns the (flag, kind) of the first class in `classes` with a character in `value`.
+
+    The value is scanned once to collect its distinct characters, the classes are then
+    only tested against those.
+    """
+    characters = set(value)
+    for flag, kind, test in classes:
+        if any(map(test, characters)):
+            return flag, kind
+    return None
+
+
+def _call(
+    validator: typing.Callable[[typing.Any], typing.Any], value: typing.Any
+) -> typing.Any:
+    result = validator(value)
+    if inspect.isawaitable(result):
+        # a coroutine is truthy, the value must not pass because the validator couldn't run
+        if inspect.iscoroutine(result):
+            result.close()
+        raise TypeError(f"{validator!r} is asynchronous, use avalidate")
+    return result
+
+
+class _Validators:
+    """The `validators` of a rule, kept as a tuple. Setting them records whether one is a coroutine function, so the
+    sync paths, which can't await it, don't have to inspect them on every call."""
+
+    def __get__(self, instance: typing.Any, owner: type | None = None) -> typing.Any:
+        if instance is None:
+            return self
+        return instance._validators
+
+    def __set__(
+        self,
+        instance: typing.Any,
+        validators: typing.Iterable[typing.Callable[[typing.Any], typing.Any]] | None,
+    ) -> None:
+        instance._validators = tuple(validators or ())
+        instance._async = any(map(inspect.iscoroutinefunction, instance._validators))
+
+
+async def _acall(
+    validator: typing.Callable[[typing.Any], typing.Any], value: typing.Any
+) -> typing.Any:
+    result = validator(value)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+async def _afirst_error(
+    fields: typing.Iterable[tuple[str, "Rule"]], values: dict[str, typing.Any]
+) -> tuple[str, "ValidationError"] | None:
+    # validates the values of a dictionary and returns the first error with its key, in the order of the
+    # rules. the rules with something to await run concurrently
+    pending: list[tuple[str, str, typing.Coroutine[typing.Any, typing.Any, None]]] = []
+    failure: tuple[str, ValidationError] | None = None
+    try:
+        for key, rule in fields:
+            if rule._awaits():
+                pending.append((key, rule.name, rule.avalidate(values.get(key))))
+            else:
+                try:
+                    rule.validate(values.get(key))
+                except ValueError as e:
+                    failure = (key, _wrap(e, rule.name))
+                    break
+    except BaseException:
+        for _, _, coroutine in pending:
+            coroutine.close()
+        raise
+
+    if failure is not None:
+        for _, _, coroutine in pending:
+            coroutine.close()
+        return failure
+
+    if len(pending) == 1:
+        key, name, coroutine = pending[0]
+        try:
+            await coroutine
+        except ValueError as e:
+            return key, _wrap(e, name)
+    elif pending:
+        results = await asyncio.gather(
+            *(coroutine for _, _, coroutine in pending), return_exceptions=True
+        )
+        for (key, name, _), result in zip(pending, results):
+            if isinstance(result, ValueError):
+                return key, _wrap(result, name)
+            if isinstance(result, BaseException):
+                raise result
+    return None
+
+
+def _by_cost(
+    items: typing.Iterable[tuple[typing.Any, "Rule"]],
+) -> tuple[tuple[typing.Any, "Rule"], ...]:
+    # stable, so rules of the same cost keep their declaration order
+    return tuple(sorted(items, key=lambda item: item[1]._cost()))
+
+
+_T = typing.TypeVar("_T")
+
+
+def _alternatives(
+    rules: typing.Iterable["Rule"],
+) -> tuple[tuple["Rule", tuple[type, ...] | None], ...]:
+    # the rules of an `Any` from the cheapest to the most expensive, with the types they accept
+    return tuple(
+        (rule, rule._types()) for rule in sorted(rules, key=lambda rule: rule._cost())
+    )
+
+
+def _candidates(
+    alternatives: tuple[tuple[_T, tuple[type, ...] | None], ...],
+    kind: type,
+    dispatch: bool,
+) -> typing.Iterator[_T]:
+    # the alternatives worth trying for a value of type `kind`, in order
+    for alternative, types in alternatives:
+        if not dispatch or types is None or issubclass(kind, types):
+            yield alternative
+
+
+def _hashable(value: typing.Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
 
 
 class Rule:
@@ -12,11 +404,130 @@ class Rule:
     def validate(self, other: typing.Any) -> None:
         pass
 
+    def compile(self) -> typing.Callable[[typing.Any], None]:
+        """Walks the rule tree once and returns a validator that behaves like `validate`.
+
+        The returned callable only runs the checks that are enabled on the rules, so it
+        should be preferred when the same schema validates many values. Changes made to the
+        rules after compiling are not seen by the validator.
+
+        Returns:
+            Callable[[Any], None]: A function that raises `ValueError` if the value is invalid.
+        """
+        return self._compile()
+
+    def _compile(self) -> _Check:
+        # rules that don't specialize their checks, custom rules included, validate as they do uncompiled
+        return self.validate
+
+    async def avalidate(self, other: typing.Any) -> None:
+        """Validates the value like `validate`, without blocking the event loop on database lookups or
+        coroutine validators.
+
+        Raises:
+            ValueError: If the value is invalid.
+        """
+        self.validate(other)
+
+    def _awaits(self) -> bool:
+        # whether avalidate has anything to await, rules holding other rules only schedule those concurrently
+        return False
+
+    def _cost(self) -> int:
+        # the most expensive check the rule may run, see the _COST_ constants
+        return _COST_TYPE
+
+    def _types(self) -> tuple[type, ...] | None:
+        # the types a value other than None must be an instance of to pass, None if any type may pass
+        return None
+
+    async def _avalidate_elements(self, values: list[typing.Any]) -> None:
+        if not self._awaits():
+            self._validate_elements(values)
+            return
+        for i, value in enumerate(values):
+            try:
+                await self.avalidate(value)
+            except ValueError as e:
+                raise _wrap(e, self.name).within(self.name, i)
+
+    def collect_errors(self, other: typing.Any) -> list[ValidationError]:
+        """Validates the whole value and returns every error found, instead of raising the first one.
+
+        The value is walked once. Each error describes where and why the validation failed (see
+        `ValidationError.toDict`), its message is only rendered when it's turned into a string.
+
+        Args:
+            other (Any): The value to be validated.
+
+        Returns:
+            list[ValidationError]: The errors found, empty if the value is valid.
+        """
+        errors: list[ValidationError] = []
+        self._collect(other, errors)
+        return errors
+
+    def _collect(self, other: typing.Any, errors: list[ValidationError]) -> None:
+        # rules that hold other rules override this to keep going after an error
+        try:
+            self.validate(other)
+        except ValueError as e:
+            errors.append(_wrap(e, self.name))
+
+    def _collect_elements(
+        self, values: list[typing.Any], errors: list[ValidationError]
+    ) -> None:
+        for i, value in enumerate(values):
+            start = len(errors)
+            self._collect(value, errors)
+            for error in errors[start:]:
+                error.within(self.name, i)
+
+    def _validate_column(
+        self, values: list[typing.Any]
+    ) -> typing.Iterator[tuple[int, ValidationError]]:
+        # validates the values of a column of records, yields the index and error of the invalid ones. rules that can
+        # check a whole column at once override this
+        check = self._compile()
+        for i, value in enumerate(values):
+            try:
+                check(value)
+            except ValueError as e:
+                yield i, _wrap(e, self.name)
+
+    def _validate_elements(self, values: list[typing.Any]) -> None:
+        # validates the elements of a list, rules that can check a whole list at once override this
+        for i, value in enumerate(values):
+            try:
+                self.validate(value)
+            except ValueError as e:
+                raise _wrap(e, self.name).within(self.name, i)
+
+    def _compile_elements(self) -> _Check:
+        name = self.name
+        element = self._compile()
+
+        def check(values: list[typing.Any]) -> None:
+            for i, value in enumerate(values):
+                try:
+                    element(value)
+                except ValueError as e:
+                    raise _wrap(e, name).within(name, i)
+
+        return check
+
     def toDict(self) -> dict[str, typing.Any]:
         return {"name": self.name, "nullable": self.nullable, "type": "base"}
 
 
 class String(Rule):
+    allow_whitespace = _AllowFlag()
+    allow_numeric = _AllowFlag()
+    allow_special_characters = _AllowFlag()
+    allow_uppercase = _AllowFlag()
+    allow_lowercase = _AllowFlag()
+    validators = _Validators()
+
     def __init__(
         self,
         _name: str = "value",
@@ -52,7 +563,7 @@ class String(Rule):
         super().__init__(nullable=nullable, _name=_name)
         self.min_length = min_length
         self.max_length = max_length
-        self.validators = validators or []
+        self.validators = validators
         self.allow_whitespace = allow_whitespace
         self.allow_numeric = allow_numeric
         self.allow_special_characters = allow_special_characters
@@ -60,6 +571,15 @@ class String(Rule):
         self.allow_lowercase = allow_lowercase
         self.pattern = pattern
 
+    @property
+    def pattern(self) -> str | None:
+        return self._pattern.pattern if self._pattern is not None else None
+
+    @pattern.setter
+    def pattern(self, pattern: str | None) -> None:
+        # compiled once here instead of going through the `re` module cache on every value
+        self._pattern = re.compile(pattern) if pattern is not None else None
+
     def toDict(self) -> dict[str, typing.Any]:
         return {
             "type": "string",
@@ -84,52 +604,160 @@ class String(Rule):
         Raises:
             ValueError: If the string value is invalid.
         """
+        if self._async:
+            raise TypeError(f"{self.name} has asynchronous validators, use avalidate")
+        if self._validate_constraints(other):
+            for validator in self._validators:
+                if not _call(validator, other):
+                    raise ValidationError(
+                        self.name, "string", "validators", value=other
+                    )
+
+    async def avalidate(self, other: str | None) -> None:
+        """Validates the string value like `validate`, awaiting the validators that are coroutine functions.
+
+        Args:
+            other (str): The string value to be validated.
+
+        Raises:
+            ValueError: If the string value is invalid.
+        """
+        if self._validate_constraints(other):
+            for validator in self._validators:
+                if not await _acall(validator, other):
+                    raise ValidationError(
+                        self.name, "string", "validators", value=other
+                    )
+
+    def _awaits(self) -> bool:
+        return self._async
+
+    def _cost(self) -> int:
+        if self._validators:
+            return _COST_CALL
+        if self._pattern is not None:
+            return _COST_PATTERN
+        if self._disallowed:
+            return _COST_SCAN
+        return _COST_TYPE
+
+    def _types(self) -> tuple[type, ...]:
+        return (str,)
+
+    def _validate_constraints(self, other: str | None) -> bool:
+        # validates everything but the validators, returns whether they should run
         if other is None:
             if not self.nullable:
-                raise ValueError(
-                    "{self.name} is None but nullable flag is set to False"
-                )
+                raise ValidationError(self.name, "string", "nullable")
+            return False
         else:
             if not isinstance(other, str):
-                raise ValueError(f"{self.name} is not a valid string")
+                raise ValidationError(self.name, "string", "type")
 
             if self.min_length is not None and len(other) < self.min_length:
-                raise ValueError(
-                    f"{self.name} '{other}' is shorter than the minimum length of {self.min_length}"
+                raise ValidationError(
+                    self.name,
+                    "string",
+                    "min_length",
+                    value=other,
+                    min_length=self.min_length,
                 )
             if self.max_length is not None and len(other) > self.max_length:
-                raise ValueError(
-                    f"{self.name} '{other}' is longer than the maximum length of {self.max_length}"
-                )
-            if not self.allow_whitespace and any(c.isspace() for c in other):
-                raise ValueError(
-                    f"{self.name} '{other}' contains whitespace characters but allow_whitespace flag is set to False"
-                )
-            if not self.allow_numeric and any(c.isnumeric() for c in other):
-                raise ValueError(
-                    f"{self.name} '{other}' contains numeric characters but allow_numeric flag is set to False"
+                raise ValidationError(
+                    self.name,
+                    "string",
+                    "max_length",
+                    value=other,
+                    max_length=self.max_length,
                 )
-            if not self.allow_special_characters and any(
-                not c.isalnum() for c in other
-            ):
-                raise ValueError(
-                    f"{self.name} '{other}' contains special characters but allow_special_characters flag is set to False"
+            if self._disallowed:
+                disallowed = _find_disallowed_characters(other, self._disallowed)
+                if disallowed is not None:
+                    flag, kind = disallowed
+                    raise ValidationError(
+                        self.name, "string", flag, value=other, kind=kind
+                    )
+            if self._pattern is not None and not self._pattern.match(other):
+                raise ValidationError(
+                    self.name,
+                    "string",
+                    "pattern",
+                    value=other,
                 )
-            if not self.allow_uppercase and any(c.isupper() for c in other):
-                raise ValueError(
-                    f"{self.name} '{other}' contains uppercase characters but allow_uppercase flag is set to False"
-                )
-            if not self.allow_lowercase and any(c.islower() for c in other):
-                raise ValueError(
-                    f"{self.name} '{other}' contains lowercase characters but allow_lowercase flag is set to False"
-                )
-            if self.pattern is not None and not re.match(self.pattern, other):
-                raise ValueError(
-                    f"{self.name} '{other}' does not match the required pattern"
-                )
-            for validator in self.validators:
-                if not validator(other):
-                    raise ValueError(f"{self.name} '{other}' failed validation")
+            return True
+
+    def _compile(self) -> _Check:
+        if self._async:
+            raise TypeError(f"{self.name} has asynchronous validators, use avalidate")
+        name = self.name
+        steps: list[_Check] = []
+
+        if self.min_length is not None:
+            min_length = self.min_length
+
+            def check_min_length(other: str) -> None:
+                if len(other) < min_length:
+                    raise ValidationError(
+                        name,
+                        "string",
+                        "min_length",
+                        value=other,
+                        min_length=min_length,
+                    )
+
+            steps.append(check_min_length)
+
+        if self.max_length is not None:
+            max_length = self.max_length
+
+            def check_max_length(other: str) -> None:
+                if len(other) > max_length:
+                    raise ValidationError(
+                        name,
+                        "string",
+                        "max_length",
+                        value=other,
+                        max_length=max_length,
+                    )
+
+            steps.append(check_max_length)
+
+        classes = self._disallowed
+        if classes:
+
+            def check_characters(other: str) -> None:
+                disallowed = _find_disallowed_characters(other, classes)
+                if disallowed is not None:
+                    flag, kind = disallowed
+                    raise ValidationError(name, "string", flag, value=other, kind=kind)
+
+            steps.append(check_characters)
+
+        if self._pattern is not None:
+            pattern = self._pattern
+
+            def check_pattern(other: str) -> None:
+                if not pattern.match(other):
+                    raise ValidationError(
+                        name,
+                        "string",
+                        "pattern",
+                        value=other,
+                    )
+
+            steps.append(check_pattern)
+
+        if self._validators:
+            validators = self._validators
+
+            def check_validators(other: str) -> None:
+                for validator in validators:
+                    if not _call(validator, other):
+                        raise ValidationError(name, "string", "validators", value=other)
+
+            steps.append(check_validators)
+
+        return _compile_checks(name, "string", self.nullable, str, steps)
 
 
 class Number(Rule):
@@ -147,6 +775,8 @@ class Number(Rule):
         ValueError: If the numeric value is invalid.
     """
 
+    validators = _Validators()
+
     def __init__(
         self,
         _name="value",
@@ -159,7 +789,7 @@ class Number(Rule):
         super().__init__(nullable=nullable, _name=_name)
         self.minimum = minimum
         self.maximum = maximum
-        self.validators = validators or []
+        self.validators = validators
         self.integer_only = integer_only
 
     def toDict(self) -> dict[str, typing.Any]:
@@ -181,30 +811,135 @@ class Number(Rule):
         Raises:
             ValueError: If the numeric value is invalid.
         """
+        if self._async:
+            raise TypeError(f"{self.name} has asynchronous validators, use avalidate")
+        if self._validate_constraints(other):
+            for validator in self._validators:
+                if not _call(validator, other):
+                    raise ValidationError(
+                        self.name, "number", "validators", value=other
+                    )
+
+    async def avalidate(self, other: int | float | None) -> None:
+        """Validates the numeric value like `validate`, awaiting the validators that are coroutine functions.
+
+        Args:
+            other (int|float|None): The numeric value to be validated.
+
+        Raises:
+            ValueError: If the numeric value is invalid.
+        """
+        if self._validate_constraints(other):
+            for validator in self._validators:
+                if not await _acall(validator, other):
+                    raise ValidationError(
+                        self.name, "number", "validators", value=other
+                    )
+
+    def _awaits(self) -> bool:
+        return self._async
+
+    def _cost(self) -> int:
+        return _COST_CALL if self._validators else _COST_TYPE
+
+    def _types(self) -> tuple[type, ...]:
+        return (int, float)
+
+    def _validate_constraints(self, other: int | float | None) -> bool:
+        # validates everything but the validators, returns whether they should run
         if other is None:
             if not self.nullable:
-                raise ValueError(
-                    f"{self.name} is None but nullable flag is set to False"
-                )
+                raise ValidationError(self.name, "number", "nullable")
+            return False
         else:
             if not isinstance(other, (int, float)):
-                raise ValueError(f"{self.name} is not a number value")
+                raise ValidationError(self.name, "number", "type")
 
             if self.minimum is not None and other < self.minimum:
-                raise ValueError(
-                    f"{self.name}: {other} is less than the minimum value of {self.minimum}"
+                raise ValidationError(
+                    self.name,
+                    "number",
+                    "minimum",
+                    value=other,
+                    minimum=self.minimum,
                 )
             if self.maximum is not None and other > self.maximum:
-                raise ValueError(
-                    f"{self.name}: {other} is greater than the maximum value of {self.maximum}"
+                raise ValidationError(
+                    self.name,
+                    "number",
+                    "maximum",
+                    value=other,
+                    maximum=self.maximum,
                 )
             if self.integer_only and not isinstance(other, int):
-                raise ValueError(
-                    f"{self.name}: {other} is not an integer but integer_only flag is set to True"
+                raise ValidationError(
+                    self.name,
+                    "number",
+                    "integer_only",
+                    value=other,
                 )
-            for validator in self.validators:
-                if not validator(other):
-                    raise ValueError(f"{self.name}: {other} failed validation")
+            return True
+
+    def _compile(self) -> _Check:
+        if self._async:
+            raise TypeError(f"{self.name} has asynchronous validators, use avalidate")
+        name = self.name
+        steps: list[_Check] = []
+
+        if self.minimum is not None:
+            minimum = self.minimum
+
+            def check_minimum(other: int | float) -> None:
+                if other < minimum:
+                    raise ValidationError(
+                        name,
+                        "number",
+                        "minimum",
+                        value=other,
+                        minimum=minimum,
+                    )
+
+            steps.append(check_minimum)
+
+        if self.maximum is not None:
+            maximum = self.maximum
+
+            def check_maximum(other: int | float) -> None:
+                if other > maximum:
+                    raise ValidationError(
+                        name,
+                        "number",
+                        "maximum",
+                        value=other,
+                        maximum=maximum,
+                    )
+
+            steps.append(check_maximum)
+
+        if self.integer_only:
+
+            def check_integer(other: int | float) -> None:
+                if not isinstance(other, int):
+                    raise ValidationError(
+                        name,
+                        "number",
+                        "integer_only",
+                        value=other,
+                    )
+
+            steps.append(check_integer)
+
+        if self._validators:
+            validators = self._validators
+
+            def check_validators(other: int | float) -> None:
+                for validator in validators:
+                    if not _call(validator, other):
+                        raise ValidationError(name, "number", "validators", value=other)
+
+            steps.append(check_validators)
+
+        return _compile_checks(name, "number", self.nullable, (int, float), steps)
 
 
 class Boolean(Rule):
@@ -240,12 +975,16 @@ class Boolean(Rule):
         """
         if other is None:
             if not self.nullable:
-                raise ValueError(
-                    f"{self.name} is None but nullable flag is set to False"
-                )
+                raise ValidationError(self.name, "boolean", "nullable")
         else:
             if not isinstance(other, bool):
-                raise ValueError(f"{self.name} is not a valid boolean value")
+                raise ValidationError(self.name, "boolean", "type")
+
+    def _types(self) -> tuple[type, ...]:
+        return (bool,)
+
+    def _compile(self) -> _Check:
+        return _compile_checks(self.name, "boolean", self.nullable, bool, [])
 
 
 class Dictionary(Rule):
@@ -295,42 +1034,233 @@ class Dictionary(Rule):
         Args:
             rules (Dict[Any, Type[Rule]]): A dictionary mapping keys to validation rules for the corresponding values.
         """
-        self.rules.update(rules)
+        self._rules.update(rules)
+        self._ordered_rules = _by_cost(self._rules.items())
+
+    @property
+    def rules(self) -> typing.Mapping[str, Rule]:
+        # a read-only view, the rules change through the setter or `add_rules` so they are reordered
+        return types.MappingProxyType(self._rules)
+
+    @rules.setter
+    def rules(self, rules: typing.Mapping[str, Rule]) -> None:
+        self._rules = dict(rules)
+        # the rules from the cheapest to the most expensive, so a type mismatch is reported before a regular
+        # expression runs or the database is queried
+        self._ordered_rules = _by_cost(self._rules.items())
 
     def validate(self, other: dict[str, typing.Any] | None) -> None:
         """Validates the dictionary value against the specified rules.
 
+        The rules run from the cheapest to the most expensive (type checks, then regular expressions,
+        custom validators and database lookups), so the error raised is the cheapest one to find.
+
+        Args:
+            other (dict): The dictionary value to be validated.
+
+        Raises:
+            ValueError: If the dictionary value is invalid.
+        """
+        if self._validate_shape(other):
+            for key, rule in self._ordered_rules:
+                try:
+                    rule.validate(other.get(key))
+                except ValueError as e:
+                    raise _wrap(e, rule.name).within(self.name, key)
+
+    async def avalidate(self, other: dict[str, typing.Any] | None) -> None:
+        """Validates the dictionary value like `validate`. The values whose rules query the database or await
+        validators are validated concurrently.
+
         Args:
             other (dict): The dictionary value to be validated.
 
         Raises:
             ValueError: If the dictionary value is invalid.
         """
+        if self._validate_shape(other):
+            failure = await _afirst_error(self._ordered_rules, other)
+            if failure is not None:
+                key, error = failure
+                raise error.within(self.name, key)
+
+    def _awaits(self) -> bool:
+        return any(rule._awaits() for rule in self.rules.values())
+
+    def _cost(self) -> int:
+        return max((rule._cost() for rule in self.rules.values()), default=_COST_TYPE)
+
+    def _types(self) -> tuple[type, ...]:
+        return (dict,)
+
+    def _validate_shape(self, other: dict[str, typing.Any] | None) -> bool:
+        # validates the dictionary itself, returns whether its values should be validated
         if other is None:
             if not self.nullable:
-                raise ValueError(
-                    f"{self.name} is None but nullable flag is set to False"
-                )
+                raise ValidationError(self.name, "dictionary", "nullable")
+            return False
         elif not isinstance(other, dict):
-            raise ValueError(f"{self.name} is not a dictionary")
-
-        else:
-            if self.min_length is not None and len(other) < self.min_length:
-                raise ValueError(
-                    f"{self.name} has {len(other)} key-value pairs, which is less than the minimum of {self.min_length}"
-                )
-            if self.max_length is not None and len(other) > self.max_length:
-                raise ValueError(
-                    f"{self.name} has {len(other)} key-value pairs, which is more than the maximum of {self.max_length}"
+            raise ValidationError(self.name, "dictionary", "type")
+
+        error = self._length_error(other) or self._unknown_keys_error(other)
+        if error is not None:
+            raise error
+        return True
+
+    def _length_error(self, other: dict[str, typing.Any]) -> ValidationError | None:
+        if self.min_length is not None and len(other) < self.min_length:
+            return ValidationError(
+                self.name,
+                "dictionary",
+                "min_length",
+                length=len(other),
+                min_length=self.min_length,
+            )
+        if self.max_length is not None and len(other) > self.max_length:
+            return ValidationError(
+                self.name,
+                "dictionary",
+                "max_length",
+                length=len(other),
+                max_length=self.max_length,
+            )
+        return None
+
+    def _unknown_keys_error(
+        self, other: dict[str, typing.Any]
+    ) -> ValidationError | None:
+        if not self.allow_unknown_keys:
+            unknown_keys = other.keys() - self._rules.keys()
+            if unknown_keys:
+                return ValidationError(
+                    self.name, "dictionary", "allow_unknown_keys", keys=unknown_keys
                 )
-            if not self.allow_unknown_keys:
-                unknown_keys = set(other.keys()) - set(self.rules.keys())
+        return None
+
+    def _collect(self, other: typing.Any, errors: list[ValidationError]) -> None:
+        if not isinstance(other, dict):
+            super()._collect(other, errors)
+            return
+
+        for error in (self._length_error(other), self._unknown_keys_error(other)):
+            if error is not None:
+                errors.append(error)
+
+        for key, rule in self._ordered_rules:
+            start = len(errors)
+            rule._collect(other.get(key), errors)
+            for error in errors[start:]:
+                error.within(self.name, key)
+
+    def validate_many(
+        self, records: list[dict[str, typing.Any] | None]
+    ) -> dict[int, list[ValidationError]]:
+        """Validates many dictionary values against the specified rules, without stopping at the first invalid one.
+
+        Each record is checked as a whole first, then the records that passed are validated one key (column) at a
+        time: the rules are compiled once for the whole batch, and a `Model` rule looks its whole column up at once.
+
+        Args:
+            records (list[dict]): The dictionary values to be validated.
+
+        Returns:
+            dict[int, list[ValidationError]]: The errors of every invalid record, by the record's index. Empty if all
+                the records are valid.
+        """
+        check = _compile_checks(
+            self.name,
+            "dictionary",
+            self.nullable,
+            dict,
+            self._compile_shape_steps(),
+        )
+        errors: dict[int, list[ValidationError]] = {}
+        valid: list[tuple[int, dict[str, typing.Any]]] = []
+
+        for i, record in enumerate(records):
+            try:
+                check(record)
+            except ValueError as e:
+                errors[i] = [_wrap(e, self.name)]
+                continue
+            if record is not None:
+                valid.append((i, record))
+
+        for key, rule in self._ordered_rules:
+            column = [record.get(key) for _, record in valid]
+            for n, error in rule._validate_column(column):
+                errors.setdefault(valid[n][0], []).append(error.within(self.name, key))
+
+        return dict(sorted(errors.items()))
+
+    def _compile_shape_steps(self) -> list[_Check]:
+        # checks on the dictionary itself, without the rules of its values
+        name = self.name
+        steps: list[_Check] = []
+
+        if self.min_length is not None:
+            min_length = self.min_length
+
+            def check_min_length(other: dict[str, typing.Any]) -> None:
+                if len(other) < min_length:
+                    raise ValidationError(
+                        name,
+                        "dictionary",
+                        "min_length",
+                        length=len(other),
+                        min_length=min_length,
+                    )
+
+            steps.append(check_min_length)
+
+        if self.max_length is not None:
+            max_length = self.max_length
+
+            def check_max_length(other: dict[str, typing.Any]) -> None:
+                if len(other) > max_length:
+                    raise ValidationError(
+                        name,
+                        "dictionary",
+                        "max_length",
+                        length=len(other),
+                        max_length=max_length,
+                    )
+
+            steps.append(check_max_length)
+
+        if not self.allow_unknown_keys:
+            known_keys = frozenset(self.rules)
+
+            def check_unknown_keys(other: dict[str, typing.Any]) -> None:
+                unknown_keys = other.keys() - known_keys
                 if unknown_keys:
-                    raise ValueError(f"{self.name} has unknown keys: {unknown_keys}")
+                    raise ValidationError(
+                        name, "dictionary", "allow_unknown_keys", keys=unknown_keys
+                    )
 
-            for key, rule in self.rules.items():
-                rule.name = f"{self.name}.{key}"
-                rule.validate(other.get(key))
+            steps.append(check_unknown_keys)
+
+        return steps
+
+    def _compile(self) -> _Check:
+        name = self.name
+        steps = self._compile_shape_steps()
+
+        if self.rules:
+            children = tuple(
+                (key, rule.name, rule._compile()) for key, rule in self._ordered_rules
+            )
+
+            def check_children(other: dict[str, typing.Any]) -> None:
+                for key, child_name, child in children:
+                    try:
+                        child(other.get(key))
+                    except ValueError as e:
+                        raise _wrap(e, child_name).within(name, key)
+
+            steps.append(check_children)
+
+        return _compile_checks(name, "dictionary", self.nullable, dict, steps)
 
 
 class StructuredInput(Rule):
@@ -351,8 +1281,28 @@ class StructuredInput(Rule):
 
         input_dict = {'name': 'John Doe', 'age': 25}
         MyInput.validate(input_dict)
+
+    The rules, including the ones inherited from base classes, are collected once when the class is defined.
     """
 
+    # (field name, rule) pairs in definition order, base class rules first
+    _fields: tuple[tuple[str, Rule], ...] = ()
+    # the same pairs from the cheapest rule to the most expensive, the order fail-fast validation runs them in
+    _ordered_fields: tuple[tuple[str, Rule], ...] = ()
+
+    def __init_subclass__(cls, **kwargs: typing.Any) -> None:
+        super().__init_subclass__(**kwargs)
+        fields: dict[str, Rule] = {}
+        for klass in reversed(cls.__mro__):
+            for field_name, field in vars(klass).items():
+                if isinstance(field, Rule):
+                    fields[field_name] = field
+                else:
+                    # a subclass can drop an inherited rule by overriding it with a non-rule value
+                    fields.pop(field_name, None)
+        cls._fields = tuple(fields.items())
+        cls._ordered_fields = _by_cost(cls._fields)
+
     @classmethod
     def validate(cls, input_dict: dict[str, typing.Any]) -> None:
         """
@@ -367,13 +1317,105 @@ class StructuredInput(Rule):
         Returns:
             None
         """
-        for field_name, field in cls.__dict__.items():
-            if isinstance(field, Rule):
+        for field_name, field in cls._ordered_fields:
+            try:
+                field.validate(input_dict.get(field_name))
+            except ValueError as e:
+                raise ValueError(f"{field_name}: {str(e)}")
+
+    @classmethod
+    async def avalidate(cls, input_dict: dict[str, typing.Any]) -> None:
+        """
+        Validates input data like `validate`. The fields whose rules query the database or await validators are
+        validated concurrently.
+
+        Args:
+            input_dict (dict[str, typing.Any]): A dictionary containing the input data to be validated.
+
+        Raises:
+            ValueError: If any of the input data violates the validation rules defined in the class.
+        """
+        failure = await _afirst_error(cls._ordered_fields, input_dict)
+        if failure is not None:
+            field_name, error = failure
+            raise ValueError(f"{field_name}: {str(error)}")
+
+    @classmethod
+    def compile(cls) -> typing.Callable[[dict[str, typing.Any]], None]:
+        """
+        Collects the rules defined in the class once and returns a validator that behaves like `validate`.
+
+        Returns:
+            Callable[[dict[str, typing.Any]], None]: A function that raises `ValueError` if the input data is invalid.
+        """
+        fields = tuple(
+            (field_name, field._compile()) for field_name, field in cls._ordered_fields
+        )
+
+        def validator(input_dict: dict[str, typing.Any]) -> None:
+            for field_name, check in fields:
                 try:
-                    field.validate(input_dict.get(field_name))
+                    check(input_dict.get(field_name))
                 except ValueError as e:
                     raise ValueError(f"{field_name}: {str(e)}")
 
+        return validator
+
+    @classmethod
+    def collect_errors(cls, input_dict: dict[str, typing.Any]) -> list[ValidationError]:
+        """
+        Validates all the input data and returns every error found, instead of raising the first one.
+
+        Args:
+            input_dict (dict[str, typing.Any]): A dictionary containing the input data to be validated.
+
+        Returns:
+            list[ValidationError]: The errors found, their path starts with the name of the field and they render as
+                `validate` reports them. Empty if the input data is valid.
+        """
+        errors: list[ValidationError] = []
+        for field_name, field in cls._fields:
+            start = len(errors)
+            field._collect(input_dict.get(field_name), errors)
+            for error in errors[start:]:
+                error.within_field(field_name)
+        return errors
+
+    @classmethod
+    def validate_many(
+        cls, records: list[dict[str, typing.Any]]
+    ) -> dict[int, list[ValidationError]]:
+        """
+        Validates many input data against the rules defined in the class, without stopping at the first invalid one.
+
+        The rules are collected and compiled once for the whole batch, then the records are validated one field (column)
+        at a time, a `Model` rule looking its whole column up at once.
+
+        Args:
+            records (list[dict[str, typing.Any]]): The input data to be validated.
+
+        Returns:
+            dict[int, list[ValidationError]]: The errors of every invalid record, by the record's index, they render as
+                `validate` reports them. Empty if all the records are valid.
+        """
+        errors: dict[int, list[ValidationError]] = {}
+        valid: list[tuple[int, dict[str, typing.Any]]] = []
+
+        for i, record in enumerate(records):
+            if isinstance(record, dict):
+                valid.append((i, record))
+            else:
+                errors[i] = [ValidationError("input", "dictionary", "type")]
+
+        for field_name, field in cls._fields:
+            column = [record.get(field_name) for _, record in valid]
+            for n, error in field._validate_column(column):
+                errors.setdefault(valid[n][0], []).append(
+                    error.within_field(field_name)
+                )
+
+        return dict(sorted(errors.items()))
+
 
 class List(Rule):
     """A validation rule for lists.
@@ -436,27 +1478,124 @@ class List(Rule):
         }
 
     def validate(self, other: list[typing.Any] | None) -> None:
+        if self._validate_shape(other):
+            try:
+                self.element_rule._validate_elements(other)
+            except ValidationError as e:
+                e.within(self.name)
+                raise
+
+    async def avalidate(self, other: list[typing.Any] | None) -> None:
+        if self._validate_shape(other):
+            try:
+                await self.element_rule._avalidate_elements(other)
+            except ValidationError as e:
+                e.within(self.name)
+                raise
+
+    def _awaits(self) -> bool:
+        return self.element_rule._awaits()
+
+    def _cost(self) -> int:
+        # every element is checked
+        return max(_COST_SCAN, self.element_rule._cost())
+
+    def _types(self) -> tuple[type, ...]:
+        return (list,)
+
+    def _validate_shape(self, other: list[typing.Any] | None) -> bool:
+        # validates the list itself, returns whether its elements should be validated
         if other is None:
             if not self.nullable:
-                raise ValueError(
-                    f"{self.name} is None but nullable flag is set to False"
-                )
+                raise ValidationError(self.name, "list", "nullable")
+            return False
         elif not isinstance(other, list):
-            raise ValueError(f"{self.name} is not a list")
+            raise ValidationError(self.name, "list", "type")
+
+        error = self._length_error(other)
+        if error is not None:
+            raise error
+        return True
+
+    def _length_error(self, other: list[typing.Any]) -> ValidationError | None:
+        if self.min_length is not None and len(other) < self.min_length:
+            return ValidationError(
+                self.name,
+                "list",
+                "min_length",
+                length=len(other),
+                min_length=self.min_length,
+            )
+        if self.max_length is not None and len(other) > self.max_length:
+            return ValidationError(
+                self.name,
+                "list",
+                "max_length",
+                length=len(other),
+                max_length=self.max_length,
+            )
+        return None
+
+    def _collect(self, other: typing.Any, errors: list[ValidationError]) -> None:
+        if not isinstance(other, list):
+            super()._collect(other, errors)
+            return
+
+        error = self._length_error(other)
+        if error is not None:
+            errors.append(error)
+
+        start = len(errors)
+        self.element_rule._collect_elements(other, errors)
+        for error in errors[start:]:
+            error.within(self.name)
+
+    def _compile(self) -> _Check:
+        name = self.name
+        steps: list[_Check] = []
+
+        if self.min_length is not None:
+            min_length = self.min_length
+
+            def check_min_length(other: list[typing.Any]) -> None:
+                if len(other) < min_length:
+                    raise ValidationError(
+                        name,
+                        "list",
+                        "min_length",
+                        length=len(other),
+                        min_length=min_length,
+                    )
+
+            steps.append(check_min_length)
+
+        if self.max_length is not None:
+            max_length = self.max_length
+
+            def check_max_length(other: list[typing.Any]) -> None:
+                if len(other) > max_length:
+                    raise ValidationError(
+                        name,
+                        "list",
+                        "max_length",
+                        length=len(other),
+                        max_length=max_length,
+                    )
+
+            steps.append(check_max_length)
+
+        elements = self.element_rule._compile_elements()
+
+        def check_elements(other: list[typing.Any]) -> None:
+            try:
+                elements(other)
+            except ValidationError as e:
+                e.within(name)
+                raise
 
-        else:
-            if self.min_length is not None and len(other) < self.min_length:
-                raise ValueError(
-                    f"{self.name} has {len(other)} elements, which is less than the minimum of {self.min_length}"
-                )
-            if self.max_length is not None and len(other) > self.max_length:
-                raise ValueError(
-                    f"{self.name} has {len(other)} elements, which is more than the maximum of {self.max_length}"
-                )
+        steps.append(check_elements)
 
-            for i, element in enumerate(other):
-                self.element_rule.name = f"{self.name}[{i}]"
-                self.element_rule.validate(element)
+        return _compile_checks(name, "list", self.nullable, list, steps)
 
 
 class Any(Rule):
@@ -489,6 +1628,10 @@ class Any(Rule):
         rules (List[Rule], optional): A list of validation rules that the value being compared against must pass at least one of.
         _name (str, optional): The name of the value being validated. Defaults to "value".
         nullable (bool, optional): Whether or not the value being validated can be None. Defaults to False.
+        dispatch (bool, optional): Whether to skip the rules that can't accept the type of the value, e.g. a `Number`
+            for a string, instead of trying them. Defaults to True.
+
+    The rules are tried from the cheapest to the most expensive.
     """
 
     def __init__(
@@ -496,42 +1639,106 @@ class Any(Rule):
         rules: list[Rule] | None = None,
         _name: str = "value",
         nullable: bool = False,
+        dispatch: bool = True,
     ) -> None:
         super().__init__(_name=_name, nullable=nullable)
         self.rules = rules or []
+        self.dispatch = dispatch
         assert (
             len(self.rules) > 1 or len(self.rules) == 0
         ), "Two rules, or None are required to use this class"
 
+    @property
+    def rules(self) -> tuple[Rule, ...]:
+        # a tuple, the rules change through the setter so they are reordered
+        return self._rules
+
+    @rules.setter
+    def rules(self, rules: typing.Iterable[Rule]) -> None:
+        self._rules = tuple(rules)
+        self._alternatives = _alternatives(self._rules)
+
     def toDict(self) -> dict[str, typing.Any]:
         return {
             "type": "any",
             "rules": [rule.toDict() for rule in self.rules],
             "name": self.name,
             "nullable": self.nullable,
+            "dispatch": self.dispatch,
         }
 
     def validate(self, other: typing.Any | None) -> None:
         if other is None:
             if not self.nullable:
-                raise ValueError(
-                    f"{self.name} is None but nullable flag is set to False"
-                )
+                raise ValidationError(self.name, "any", "nullable")
         else:
             if not self.rules:
                 # if no rules where given just pass
                 return
 
-            for rule in self.rules:
-                # this class is just an abstract, so let's name it's children it's own name
-                rule.name = self.name
-
+            for rule in self._candidates(other):
                 try:
                     rule.validate(other)
                     return  # value passed at least one rule, so we can return
                 except ValueError:
                     pass
-            raise ValueError(f"{self.name} does not meet any of the provided rules")
+            raise ValidationError(self.name, "any", "rules")
+
+    async def avalidate(self, other: typing.Any | None) -> None:
+        if other is None:
+            if not self.nullable:
+                raise ValidationError(self.name, "any", "nullable")
+        elif self.rules:
+            for rule in self._candidates(other):
+                try:
+                    await rule.avalidate(other)
+                    return
+                except ValueError:
+                    pass
+            raise ValidationError(self.name, "any", "rules")
+
+    def _awaits(self) -> bool:
+        return any(rule._awaits() for rule in self.rules)
+
+    def _cost(self) -> int:
+        return max((rule._cost() for rule in self.rules), default=_COST_TYPE)
+
+    def _types(self) -> tuple[type, ...] | None:
+        types: list[type] = []
+        for rule in self.rules:
+            rule_types = rule._types()
+            if rule_types is None:
+                return None
+            types.extend(rule_types)
+        return tuple(types) or None
+
+    def _candidates(self, other: typing.Any) -> typing.Iterator[Rule]:
+        # the rules worth trying for the value, cheapest first
+        return _candidates(self._alternatives, type(other), self.dispatch)
+
+    def _compile(self) -> _Check:
+        name = self.name
+        nullable = self.nullable
+        rules = tuple(self.rules)
+        dispatch = self.dispatch
+        alternatives = tuple(
+            (rule._compile(), types) for rule, types in self._alternatives
+        )
+
+        def check(other: typing.Any) -> None:
+            if other is None:
+                if not nullable:
+                    raise ValidationError(name, "any", "nullable")
+            elif rules:
+                for alternative in _candidates(alternatives, type(other), dispatch):
+                    try:
+                        alternative(other)
+                        return
+                    except ValueError:
+                        pass
+                raise ValidationError(name, "any", "rules")
+
+        return check
 
 
 class Model(Rule):
@@ -544,6 +1751,10 @@ class Model(Rule):
     - name (str, optional): The name of the value being validated. Default is "value".
     - nullable (bool, optional): Whether the value can be None. Default is False.
     - filter (dict[str, Any], optional): A dictionary of additional filters to apply to the query. Default is None.
+    - cache (bool | ExistenceCache, optional): Remembers the values confirmed to exist so they are not looked up again.
+      `True` caches them for the current request (see `FreemanExistenceCacheMiddleware`), pass a
+      `ProcessExistenceCache` to share them across requests. Cached values are invalidated when a record of the model
+      is deleted or updated. Default is False.
 
     Example usage:
     ```
@@ -566,11 +1777,17 @@ class Model(Rule):
         _name: str = "value",
         nullable: bool = False,
         filter: models.Q | None = None,
+        cache: bool | existence.ExistenceCache = False,
     ) -> None:
         super().__init__(_name=_name, nullable=nullable)
         self.model = model
         self.field = field
         self.filter = filter
+        self.cache: existence.ExistenceCache | None = (
+            existence.request_cache if cache is True else cache or None
+        )
+        if self.cache is not None:
+            existence.watch(model)
 
     def toDict(self) -> dict[str, typing.Any]:
         return {
@@ -585,22 +1802,354 @@ class Model(Rule):
     def validate(self, other: typing.Any | None) -> None:
         if other is None:
             if not self.nullable:
-                raise ValueError(
-                    f"{self.name} is None but nullable flag is set to False"
-                )
-        else:
+                raise ValidationError(self.name, "django.db.models.Model", "nullable")
+        elif not self.exists(other):
+            raise ValidationError(
+                self.name,
+                "django.db.models.Model",
+                "field",
+                model=self.model.__name__,
+            )
+
+    async def avalidate(self, other: typing.Any | None) -> None:
+        if other is None:
+            if not self.nullable:
+                raise ValidationError(self.name, "django.db.models.Model", "nullable")
+        elif not await self.aexists(other):
+            raise ValidationError(
+                self.name,
+                "django.db.models.Model",
+                "field",
+                model=self.model.__name__,
+            )
+
+    def _awaits(self) -> bool:
+        return True
+
+    def _cost(self) -> int:
+        return _COST_QUERY
+
+    def exists(self, value: typing.Any) -> bool:
+        """Checks if a record matches the value, without fetching it."""
+        cache = self.cache if _hashable(value) else None
+        if cache is None:
+            queryset = self._match(value)
+            return queryset is not None and queryset.exists()
+
+        key = self._cache_key()
+        if cache.contains(key, value):
+            return True
+        generation = existence.generation(key)
+        queryset = self._match(value)
+        found = queryset is not None and queryset.exists()
+        if found:
+            cache.add(key, [value], generation)
+        return found
+
+    async def aexists(self, value: typing.Any) -> bool:
+        """Checks if a record matches the value like `exists`, with Django's async ORM."""
+        cache = self.cache if _hashable(value) else None
+        if cache is None:
+            queryset = self._match(value)
+            return queryset is not None and await queryset.aexists()
+
+        key = self._cache_key()
+        if cache.contains(key, value):
+            return True
+        generation = existence.generation(key)
+        queryset = self._match(value)
+        found = queryset is not None and await queryset.aexists()
+        if found:
+            cache.add(key, [value], generation)
+        return found
+
+    def missing(self, values: list[typing.Any]) -> list[typing.Any]:
+        """Finds the values that do not match any record, comparing them to the records like `exists` does.
+
+        The values matching a chunk of distinct values are fetched with a single `IN` query, as large as the database
+        allows, and no model instance is built. The database compares the values whose comparison it may not share
+        with Python, e.g. those of a field with its own collation or JSON values, so its rules apply.
+
+        Args:
+            values (list[Any]): The values to look for.
+
+        Returns:
+            list[Any]: The values that do not match any record, in the order they were given.
+        """
+        return [value for value, found in zip(values, self._find(values)) if not found]
+
+    def _match(self, value: typing.Any) -> models.QuerySet[typing.Any] | None:
+        # the records matching the value, converted like the field would. None if the field can't hold the value, as
+        # it can't match a record either
+        try:
+            value = self._to_python()(value)
+        except (exceptions.ValidationError, TypeError, ValueError):
+            return None
+        return self._queryset().filter(**{self.field: value})
+
+    def _find(self, values: list[typing.Any]) -> list[bool]:
+        # whether each value matches a record, values that are not cached are looked up in chunks
+        found, lookups, generation = self._find_cached(values)
+        compared, counted = self._distinct(lookups)
+        for queryset, chunk in self._fetches(compared):
+            counted.extend(self._matched(found, chunk, list(queryset)))
+        for queryset, counts, indexes in self._counts(counted):
+            self._found(found, indexes, queryset.aggregate(**counts))
+        self._cache_found(values, found, lookups, generation)
+        return found
+
+    async def _afind(self, values: list[typing.Any]) -> list[bool]:
+        found, lookups, generation = self._find_cached(values)
+        compared, counted = self._distinct(lookups)
+        for queryset, chunk in self._fetches(compared):
+            rows = [row async for row in queryset]
+            counted.extend(self._matched(found, chunk, rows))
+        for queryset, counts, indexes in self._counts(counted):
+            self._found(found, indexes, await queryset.aaggregate(**counts))
+        self._cache_found(values, found, lookups, generation)
+        return found
+
+    def _find_cached(
+        self, values: list[typing.Any]
+    ) -> tuple[list[bool], dict[int, typing.Any], int]:
+        # flags the cached values as found, and converts the others like the field would
+        found = [False] * len(values)
+        generation = 0
+        cache = self.cache
+        if cache is not None:
+            key = self._cache_key()
+            generation = existence.generation(key)
+            for i, value in enumerate(values):
+                if _hashable(value) and cache.contains(key, value):
+                    found[i] = True
+
+        to_python = self._to_python()
+        lookups: dict[int, typing.Any] = {}
+        for i, value in enumerate(values):
+            if found[i] or value is None:
+                continue
             try:
-                columns = (
-                    self.model.objects.filter(self.filter)
-                    if self.filter
-                    else self.model.objects.all()
+                lookups[i] = to_python(value)
+            except (exceptions.ValidationError, TypeError, ValueError):
+                # a value the field can't hold can't match a record either
+                pass
+        return found, lookups, generation
+
+    def _distinct(
+        self, lookups: dict[int, typing.Any]
+    ) -> tuple[list[tuple[typing.Any, list[int]]], list[tuple[typing.Any, list[int]]]]:
+        # the distinct values with the indexes they are at: those Python can compare to the values the database
+        # returns, and those the database has to compare itself
+        distinct: dict[typing.Hashable, tuple[typing.Any, list[int]]] = {}
+        for i, value in lookups.items():
+            key = (type(value), value) if _hashable(value) else i
+            distinct.setdefault(key, (value, []))[1].append(i)
+
+        if self._collates():
+            return [], list(distinct.values())
+        compared: list[tuple[typing.Any, list[int]]] = []
+        counted: list[tuple[typing.Any, list[int]]] = []
+        for value, indexes in distinct.values():
+            (compared if _hashable(value) else counted).append((value, indexes))
+        return compared, counted
+
+    def _collates(self) -> bool:
+        # whether the field compares its values with a collation of its own, which Python can't reproduce
+        try:
+            field = self.model._meta.get_field(self.field)
+        except exceptions.FieldDoesNotExist:
+            return False
+        return bool(getattr(field, "db_collation", None))
+
+    def _fetches(
+        self, compared: list[tuple[typing.Any, list[int]]]
+    ) -> typing.Iterator[
+        tuple[models.QuerySet[typing.Any], list[tuple[typing.Any, list[int]]]]
+    ]:
+        # a query per chunk of distinct values, fetching the values of the records that match them. yields the query
+        # and its chunk
+        queryset = self._queryset()
+        max_params = connections[queryset.db].features.max_query_params
+        size = max(max_params - _FILTER_PARAMS, 1) if max_params else len(compared)
+        for start in range(0, len(compared), size):
+            chunk = compared[start : start + size]
+            values = [value for value, _ in chunk]
+            yield queryset.filter(**{f"{self.field}__in": values}).values_list(
+                self.field, flat=True
+            ), chunk
+
+    def _matched(
+        self,
+        found: list[bool],
+        chunk: list[tuple[typing.Any, list[int]]],
+        rows: list[typing.Any],
+    ) -> list[tuple[typing.Any, list[int]]]:
+        # flags the values of the chunk found among the rows. when the database returned a row equal to none of them,
+        # it compares them differently (e.g. without case), so the values that weren't found are returned for it to
+        # compare, like all of them when Python can't compare the rows
+        if not all(map(_hashable, rows)):
+            return chunk
+        fetched = set(rows)
+        for value, indexes in chunk:
+            if value in fetched:
+                for i in indexes:
+                    found[i] = True
+        if fetched <= {value for value, _ in chunk}:
+            return []
+        return [(value, indexes) for value, indexes in chunk if not found[indexes[0]]]
+
+    def _counts(
+        self, counted: list[tuple[typing.Any, list[int]]]
+    ) -> typing.Iterator[
+        tuple[
+            models.QuerySet[typing.Any], dict[str, models.Count], dict[str, list[int]]
+        ]
+    ]:
+        # a query per chunk of distinct values, counting the records each value matches. the database compares them,
+        # so e.g. a case-insensitive collation or its equality of JSON values applies, and values needn't be hashable.
+        # yields the query, its counts and the indexes of the values of each count
+        for start in range(0, len(counted), _LOOKUP_CHUNK):
+            chunk = counted[start : start + _LOOKUP_CHUNK]
+            queryset = self._queryset().filter(
+                **{f"{self.field}__in": [value for value, _ in chunk]}
+            )
+            counts = {
+                f"_{n}": models.Count("pk", filter=models.Q(**{self.field: value}))
+                for n, (value, _) in enumerate(chunk)
+            }
+            indexes = {f"_{n}": indexes for n, (_, indexes) in enumerate(chunk)}
+            yield queryset, counts, indexes
+
+    def _found(
+        self,
+        found: list[bool],
+        indexes: dict[str, list[int]],
+        counts: dict[str, int],
+    ) -> None:
+        for alias, count in counts.items():
+            if count:
+                for i in indexes[alias]:
+                    found[i] = True
+
+    def _cache_found(
+        self,
+        values: list[typing.Any],
+        found: list[bool],
+        lookups: dict[int, typing.Any],
+        generation: int,
+    ) -> None:
+        if self.cache is not None:
+            confirmed = (values[i] for i in lookups if found[i])
+            self.cache.add(self._cache_key(), filter(_hashable, confirmed), generation)
+
+    def _cache_key(self) -> existence.CacheKey:
+        return (self.model._meta.label_lower, self.field, str(self.filter))
+
+    def _queryset(self) -> models.QuerySet[typing.Any]:
+        return (
+            self.model.objects.filter(self.filter)
+            if self.filter
+            else self.model.objects.all()
+        )
+
+    def _to_python(self) -> typing.Callable[[typing.Any], typing.Any]:
+        # values are compared to what the database returns, so they are converted like the field would
+        try:
+            field = self.model._meta.get_field(self.field)
+        except exceptions.FieldDoesNotExist:
+            return lambda value: value
+        return getattr(field, "to_python", lambda value: value)
+
+    def _missing_error(
+        self, values: list[typing.Any], found: list[bool]
+    ) -> ValidationError:
+        # reports the first missing value, with all the missing values as a parameter
+        missing = [value for value, exists in zip(values, found) if not exists]
+        return ValidationError(
+            self.name,
+            "django.db.models.Model",
+            "field",
+            model=self.model.__name__,
+            missing=missing,
+        ).within(self.name, found.index(False))
+
+    def _validate_elements(self, values: list[typing.Any]) -> None:
+        end = self._first_null(values)
+        self._validate_found_elements(values, end, self._find(values[:end]))
+
+    async def _avalidate_elements(self, values: list[typing.Any]) -> None:
+        end = self._first_null(values)
+        self._validate_found_elements(values, end, await self._afind(values[:end]))
+
+    def _first_null(self, values: list[typing.Any]) -> int:
+        # the index of the first None the rule doesn't allow, the length of the list if there is none. only the
+        # values before it are looked up, to report the first invalid index as validating one value at a time does
+        if not self.nullable:
+            for i, value in enumerate(values):
+                if value is None:
+                    return i
+        return len(values)
+
+    def _validate_found_elements(
+        self, values: list[typing.Any], end: int, found: list[bool]
+    ) -> None:
+        for i, value in enumerate(values[:end]):
+            if value is None:
+                found[i] = True
+        if not all(found):
+            raise self._missing_error(values[:end], found)
+        if end < len(values):
+            raise ValidationError(
+                self.name, "django.db.models.Model", "nullable"
+            ).within(self.name, end)
+
+    def _validate_column(
+        self, values: list[typing.Any]
+    ) -> typing.Iterator[tuple[int, ValidationError]]:
+        found = self._find(values)
+        for i, value in enumerate(values):
+            if value is None:
+                if not self.nullable:
+                    yield i, ValidationError(
+                        self.name, "django.db.models.Model", "nullable"
+                    )
+            elif not found[i]:
+                yield i, ValidationError(
+                    self.name,
+                    "django.db.models.Model",
+                    "field",
+                    model=self.model.__name__,
                 )
-                columns.get(**{self.field: other})
-            except self.model.DoesNotExist:
-                raise ValueError(
-                    f"{self.name} does not match any {self.model.__name__} records in the database"
+
+    def _collect_elements(
+        self, values: list[typing.Any], errors: list[ValidationError]
+    ) -> None:
+        for i, error in self._validate_column(values):
+            errors.append(error.within(self.name, i))
+
+    def _compile(self) -> _Check:
+        name = self.name
+        nullable = self.nullable
+        exists = self.exists
+        model_name = self.model.__name__
+
+        def check(other: typing.Any) -> None:
+            if other is None:
+                if not nullable:
+                    raise ValidationError(name, "django.db.models.Model", "nullable")
+            elif not exists(other):
+                raise ValidationError(
+                    name,
+                    "django.db.models.Model",
+                    "field",
+                    model=model_name,
                 )
 
+        return check
+
+    def _compile_elements(self) -> _Check:
+        return self._validate_elements
+
 
 class NonNull(Rule):
     """
@@ -619,7 +2168,16 @@ class NonNull(Rule):
 
     def validate(self, other: typing.Any) -> None:
         if other is None:
-            raise ValueError(f"{self.name} should not be None.")
+            raise ValidationError(self.name, "not-null", "nullable")
+
+    def _compile(self) -> _Check:
+        name = self.name
+
+        def check(other: typing.Any) -> None:
+            if other is None:
+                raise ValidationError(name, "not-null", "nullable")
+
+        return check
 
     def toDict(self) -> dict[str, typing.Any]:
         return {"type": "not-null", "name": self.name}
@@ -0,0 +1,147 @@
+# caches of values confirmed to exist in the database, used by `freeman.utils.dto.Model`
+import abc
+import time
+import typing
+import threading
+import contextlib
+import contextvars
+from collections import Counter, OrderedDict
+from django.db import models
+from django.db.models.signals import post_delete, post_save
+
+# (model label, field, filter) identifying what a value was checked against
+CacheKey: typing.TypeAlias = tuple[str, str, str]
+
+# bumped whenever a record of the model is deleted or updated, entries stored under an older
+# generation are stale. this makes invalidation O(1) whatever the size of the caches
+_generations: Counter[str] = Counter()
+# signals are sent from the threads of threaded workers, increments must not be lost
+_generations_lock = threading.Lock()
+_watched: set[str] = set()
+_watch_lock = threading.Lock()
+
+
+def _invalidate(sender: type[models.Model], **kwargs: typing.Any) -> None:
+    if kwargs.get("created"):
+        # a new record can't make a confirmed value stale
+        return
+    with _generations_lock:
+        _generations[sender._meta.label_lower] += 1
+
+
+def watch(model: type[models.Model]) -> None:
+    """Invalidates the cached values of `model` whenever one of its records is deleted or updated."""
+    label = model._meta.label_lower
+    with _watch_lock:
+        if label in _watched:
+            return
+        post_delete.connect(
+            _invalidate, sender=model, weak=False, dispatch_uid=f"freeman-{label}"
+        )
+        post_save.connect(
+            _invalidate, sender=model, weak=False, dispatch_uid=f"freeman-{label}"
+        )
+        _watched.add(label)
+
+
+def generation(key: CacheKey) -> int:
+    """Returns the current generation of the model of `key`. Read it before querying the database
+    so a record deleted during the query can't be cached as existing."""
+    return _generations[key[0]]
+
+
+class ExistenceCache(abc.ABC):
+    """Remembers values confirmed to exist, so checking them again doesn't hit the database."""
+
+    @abc.abstractmethod
+    def contains(self, key: CacheKey, value: typing.Hashable) -> bool: ...
+
+    @abc.abstractmethod
+    def add(
+        self, key: CacheKey, values: typing.Iterable[typing.Hashable], generation: int
+    ) -> None: ...
+
+
+_request_entries: contextvars.ContextVar[
+    dict[tuple[CacheKey, typing.Hashable], int] | None
+] = contextvars.ContextVar("freeman_existence_cache", default=None)
+
+
+@contextlib.contextmanager
+def request_scope() -> typing.Iterator[None]:
+    """Opens a scope for `RequestExistenceCache`, all the values cached within it are dropped when it exits.
+
+    `FreemanExistenceCacheMiddleware` opens one for every request.
+    """
+    token = _request_entries.set({})
+    try:
+        yield
+    finally:
+        _request_entries.reset(token)
+
+
+class RequestExistenceCache(ExistenceCache):
+    """Caches values for the duration of the current `request_scope`. Does nothing outside of a scope."""
+
+    def contains(self, key: CacheKey, value: typing.Hashable) -> bool:
+        entries = _request_entries.get()
+        return bool(entries) and entries.get((key, value)) == _generations[key[0]]
+
+    def add(
+        self, key: CacheKey, values: typing.Iterable[typing.Hashable], generation: int
+    ) -> None:
+        entries = _request_entries.get()
+        if entries is not None:
+            for value in values:
+                entries[(key, value)] = generation
+
+
+class ProcessExistenceCache(ExistenceCache):
+    """Caches values for the whole process, in a bounded LRU.
+
+    Args:
+        maxsize (int): The maximum number of values kept, the least recently used are evicted first.
+        ttl (float | None): How long, in seconds, a value is trusted. Records removed with a queryset's
+            `update()` don't send signals, so this bounds how long such changes go unnoticed.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float | None = 300) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[
+            tuple[CacheKey, typing.Hashable], tuple[int, float]
+        ] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def contains(self, key: CacheKey, value: typing.Hashable) -> bool:
+        entry = (key, value)
+        with self._lock:
+            cached = self._entries.get(entry)
+            if cached is None:
+                return False
+            generation, expires = cached
+            if generation != _generations[key[0]] or expires < time.monotonic():
+                del self._entries[entry]
+                return False
+            self._entries.move_to_end(entry)
+            return True
+
+    def add(
+        self, key: CacheKey, values: typing.Iterable[typing.Hashable], generation: int
+    ) -> None:
+        expires = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        with self._lock:
+            for value in values:
+                entry = (key, value)
+                self._entries[entry] = (generation, expires)
+                self._entries.move_to_end(entry)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# shared by all the `Model` rules created with `cache=True`
+request_cache = RequestExistenceCache()
@@ -1,26 +1,794 @@
-import json
+import io
+import abc
+import os
+import sys
+import time
+import socket
+import pickle
 import typing
+import asyncio
+import hashlib
+import inspect
+import logging
+import weakref
+import threading
 from functools import wraps
+from collections import OrderedDict
+from django.core.cache import caches
+
+if typing.TYPE_CHECKING:
+    from django.core.cache.backends.base import BaseCache
+
+_MISSING = object()
+logger = logging.getLogger(__name__)
+
+
+class CacheInfo(typing.NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int | None
+    currsize: int | None
+
+
+class CacheStats(typing.NamedTuple):
+    """What a cached function's cache did since it was created or cleared. The fields a backend can't tell
+    (e.g. the size of a Django cache) are None."""
+
+    name: str
+    hits: int
+    misses: int
+    #: results dropped to make room or because they expired
+    evictions: int | None
+    currsize: int | None
+    maxsize: int | None
+    #: approximate size of the stored results, in bytes
+    memory: int | None
+    #: seconds spent computing the results of misses
+    compute_time: float
+    #: seconds the hits would have spent computing their results, estimated from the misses
+    time_saved: float
+
+    @property
+    def hit_rate(self) -> float:
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.0
+
+
+# keyed by themselves: no two values of these types are equal, and none of them equals a key tuple
+_RAW_KEY_TYPES = frozenset((str, int, type(None)))
+
+
+def _key(
+    value: typing.Any,
+    _raw: frozenset[type] = _RAW_KEY_TYPES,
+    _dict: type = dict,
+    _list: type = list,
+    _tuple: type = tuple,
+) -> typing.Hashable:
+    # containers become tuples tagged with their type, the other values are tagged with their type too so 1,
+    # 1.0 and True don't share a key. the builtins are bound as defaults since this runs on every call
+    kind = type(value)
+    if kind is _dict:
+        parts: list[typing.Any] = [_dict]
+        append = parts.append
+        for k, v in value.items():
+            append(k if type(k) in _raw else _key(k))
+            append(v if type(v) in _raw else _key(v))
+        return _tuple(parts)
+    if kind is _list or kind is _tuple:
+        return (kind, *[v if type(v) in _raw else _key(v) for v in value])
+    if kind in _raw:
+        return value
+    if isinstance(value, (set, frozenset)):
+        return (frozenset, frozenset(map(_key, value)))
+    if isinstance(value, dict):
+        return (kind, *[(_key(k), _key(v)) for k, v in value.items()])
+    if isinstance(value, (list, tuple)):
+        return (kind, *map(_key, value))
+    hash(value)  # raises TypeError for the values that can't be keyed
+    return (kind, value)
+
+
+class _NotPlain(Exception):
+    pass
+
+
+class _PlainPickler(pickle.Pickler):
+    # the C pickler handles None, bools and exact ints, floats, bytes, strs, dicts, sets, frozensets, lists and
+    # tuples itself, this is only called for the other values
+    def reducer_override(self, obj: typing.Any) -> typing.NoReturn:
+        raise _NotPlain
+
+
+def _pickler(buffer: io.BytesIO, pickler: type[pickle.Pickler]) -> pickle.Pickler:
+    dumper = pickler(buffer, protocol=3)
+    # without the memo, equal values pickle the same whether or not they share objects
+    dumper.fast = True
+    return dumper
+
+
+def _dumps(value: typing.Any) -> bytes:
+    buffer = io.BytesIO()
+    _pickler(buffer, pickle.Pickler).dump(value)
+    return buffer.getvalue()
+
+
+# a pickler per thread, creating one costs as much as pickling a small key
+_plain = threading.local()
+
+
+def _dumps_plain(value: typing.Any) -> bytes:
+    try:
+        buffer, dumper = _plain.pickler
+    except AttributeError:
+        buffer = io.BytesIO()
+        dumper = _pickler(buffer, _PlainPickler)
+        _plain.pickler = buffer, dumper
+    buffer.seek(0)
+    buffer.truncate()
+    dumper.dump(value)
+    return buffer.getvalue()
+
+
+# how protocol 3 pickles the classes of sets and frozensets, whose items are pickled in an order that equal sets
+# don't always share
+_SET_CLASS = b"set\n"
+
+
+def make_key(
+    args: tuple[typing.Any, ...], kwargs: dict[str, typing.Any]
+) -> typing.Hashable:
+    """Builds the cache key of a call from its arguments.
+
+    Nested dictionaries, lists and tuples are keyed by their content, in order, so two calls share a key
+    exactly when their arguments would serialize to the same JSON, and their types match. Any other
+    hashable argument (datetimes, UUIDs, model instances...) is keyed by itself.
+
+    Arguments made only of builtin values are keyed by their pickle, which the C pickler writes without calling
+    back into Python however large they are. The others are keyed by a walk over them.
+
+    Raises:
+        TypeError: If an argument is unhashable and not a container, the call is then not cached.
+    """
+    try:
+        key = _dumps_plain((args, kwargs) if kwargs else args)
+    except (_NotPlain, ValueError):
+        # other values, or cyclic containers
+        pass
+    else:
+        # strings holding these bytes only cost their call the walk
+        if _SET_CLASS not in key:
+            return key
+    if kwargs:
+        return (_key(args), _key(kwargs))
+    return _key(args)
+
+
+class Backend(abc.ABC):
+    """Where a cached function keeps its results.
+
+    `cached` binds the backend to the function with `bind`, so a backend shared by several functions keeps their
+    results apart.
+    """
+
+    #: the maximum number of results kept, None when unbounded or unknown
+    maxsize: int | None = None
+
+    def bind(self, namespace: str) -> "Backend":
+        """Returns the backend to use for the function named `namespace`."""
+        return self
+
+    @abc.abstractmethod
+    def get(self, key: typing.Hashable) -> tuple[bool, typing.Any]:
+        """Returns whether a result is stored for `key`, and the result."""
+
+    @abc.abstractmethod
+    def set(self, key: typing.Hashable, value: typing.Any) -> None:
+        """Stores the result for `key`."""
+
+    @abc.abstractmethod
+    def clear(self) -> None:
+        """Drops all the results."""
+
+    def size(self) -> int | None:
+        """Returns the number of results stored, None if the backend can't tell."""
+        return None
+
+    def evictions(self) -> int | None:
+        """Returns the number of results evicted since the backend was created or cleared, None if the backend
+        can't tell."""
+        return None
+
+    def memory(self) -> int | None:
+        """Returns the approximate size of the stored results in bytes, None if the backend can't tell."""
+        return None
+
+
+class LocalBackend(Backend):
+    """Keeps the results in the process, every worker has its own.
+
+    Every operation is O(1): entries live in an `OrderedDict` ordered from the next one to be evicted to the
+    last one, an entry is moved to the end when it's read (LRU) or only when it's written (FIFO).
+
+    Args:
+        maxsize (int | None): The maximum number of results kept, None for no limit.
+        ttl (float | None): How long, in seconds, a result is kept, None for no limit.
+        policy ("lru" | "fifo"): Which result is evicted when the backend is full, the least recently used one or
+            the oldest one.
+    """
+
+    def __init__(
+        self,
+        maxsize: int | None = 128,
+        ttl: float | None = None,
+        policy: typing.Literal["lru", "fifo"] = "lru",
+    ) -> None:
+        if policy not in ("lru", "fifo"):
+            raise ValueError(f"unknown eviction policy {policy!r}, use 'lru' or 'fifo'")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.policy = policy
+        # key -> (value, expiry)
+        self._entries: OrderedDict[typing.Hashable, tuple[typing.Any, float]] = (
+            OrderedDict()
+        )
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def bind(self, namespace: str) -> "LocalBackend":
+        # every function gets its own entries, and its own maxsize
+        return LocalBackend(self.maxsize, self.ttl, self.policy)
+
+    def get(self, key: typing.Hashable) -> tuple[bool, typing.Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires >= time.monotonic():
+                    if self.policy == "lru":
+                        self._entries.move_to_end(key)
+                    return True, value
+                del self._entries[key]
+                self._evictions += 1
+            return False, None
+
+    def set(self, key: typing.Hashable, value: typing.Any) -> None:
+        if self.maxsize == 0:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            if self.maxsize is not None:
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._evictions = 0
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def evictions(self) -> int:
+        return self._evictions
+
+    def memory(self) -> int:
+        # walks every entry, so it's only computed when asked for
+        with self._lock:
+            entries = list(self._entries.items())
+        return sum(_sizeof(key) + _sizeof(value) for key, (value, _) in entries)
+
+
+def _canonical(key: typing.Any) -> typing.Any:
+    # sets iterate in an order that changes between processes, they are sorted to pickle the same everywhere
+    if type(key) is tuple:
+        return tuple(map(_canonical, key))
+    if type(key) is frozenset:
+        return (frozenset, *sorted(map(_canonical, key), key=pickle_key))
+    return key
+
+
+def pickle_key(key: typing.Hashable) -> str:
+    """Turns a cache key into a string that is the same in every process, to be stored in a shared cache.
+
+    Raises:
+        TypeError: If the key can't be pickled.
+    """
+    if type(key) is bytes:
+        # the keys of `make_key` are already pickled
+        data = key
+    else:
+        try:
+            data = _dumps(_canonical(key))
+        except (pickle.PicklingError, AttributeError, ValueError) as e:
+            raise TypeError(f"can't pickle cache key: {e}") from e
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+class DjangoBackend(Backend):
+    """Keeps the results in one of Django's caches, so every worker (and server) using the cache shares them.
+
+    The values are pickled by the Django cache. Keys are hashed from the arguments with `pickle_key`, prefixed
+    with the namespace of the function and the generation of its results, and stored under `version`: bump it
+    when the cached function starts returning something different.
+
+    The generation is read from the cache at most once every `generation_ttl` seconds, so a lookup is a single
+    round trip, and the results cleared by another process can be returned for that long.
+
+    Args:
+        cache (str | BaseCache): The alias of a cache in the `CACHES` setting, or a cache.
+        ttl (float | None): How long, in seconds, a result is kept, passed to the cache as the timeout. None keeps it
+            until the cache evicts it, as Django's `timeout=None` does.
+        version (int): The version of the keys.
+        prefix (str): Prepended to the keys.
+        generation_ttl (float): How long, in seconds, the generation read from the cache is used. 0 reads it on
+            every lookup.
+    """
+
+    def __init__(
+        self,
+        cache: "str | BaseCache" = "default",
+        ttl: float | None = None,
+        version: int = 1,
+        prefix: str = "funcache",
+        generation_ttl: float = 1.0,
+        _namespace: str = "",
+    ) -> None:
+        self.cache = cache
+        self.ttl = ttl
+        self.version = version
+        self.prefix = prefix
+        self.generation_ttl = generation_ttl
+        self.namespace = _namespace
+        # (generation, when to read it again)
+        self._generation: tuple[int, float] = (0, float("-inf"))
+
+    def bind(self, namespace: str) -> "DjangoBackend":
+        return DjangoBackend(
+            self.cache,
+            self.ttl,
+            self.version,
+            self.prefix,
+            self.generation_ttl,
+            _namespace=namespace,
+        )
+
+    @property
+    def _cache(self) -> "BaseCache":
+        # resolved when used, so the backend can be created before Django is set up
+        return caches[self.cache] if isinstance(self.cache, str) else self.cache
+
+    def _generation_key(self) -> str:
+        return f"{self.prefix}:{self.namespace}:generation"
+
+    def _set_generation(self, generation: int) -> int:
+        self._generation = (generation, time.monotonic() + self.generation_ttl)
+        return generation
+
+    def _key(self, cache: "BaseCache", key: typing.Hashable) -> str:
+        generation, expires = self._generation
+        if expires <= time.monotonic():
+            generation = self._set_generation(
+                cache.get(self._generation_key(), 0, version=self.version)
+            )
+        return f"{self.prefix}:{self.namespace}:{generation}:{pickle_key(key)}"
+
+    def get(self, key: typing.Hashable) -> tuple[bool, typing.Any]:
+        cache = self._cache
+        try:
+            stored = cache.get(self._key(cache, key), _MISSING, version=self.version)
+        except TypeError:
+            return False, None
+        if stored is _MISSING:
+            return False, None
+        return True, stored
+
+    def set(self, key: typing.Hashable, value: typing.Any) -> None:
+        cache = self._cache
+        try:
+            cache_key = self._key(cache, key)
+        except TypeError:
+            return
+        cache.set(cache_key, value, self.ttl, version=self.version)
+
+    def clear(self) -> None:
+        """Drops the results of the function for every process, by moving its keys to a new generation. The old
+        entries are left to expire, the rest of the Django cache is untouched."""
+        cache = self._cache
+        key = self._generation_key()
+        if cache.add(key, 1, None, version=self.version):
+            self._set_generation(1)
+        else:
+            self._set_generation(cache.incr(key, version=self.version))
+
+
+class TieredBackend(Backend):
+    """Looks results up in a local backend, then in a shared one, and keeps the shared results found locally.
+
+    Args:
+        local (Backend): The first backend looked up, usually a `LocalBackend` with a short `ttl` so the results
+            cleared by other processes don't linger.
+        shared (Backend): The backend looked up on a local miss, usually a `DjangoBackend`.
+    """
+
+    def __init__(self, local: Backend, shared: Backend) -> None:
+        self.local = local
+        self.shared = shared
+        self.maxsize = local.maxsize
+
+    def bind(self, namespace: str) -> "TieredBackend":
+        return TieredBackend(self.local.bind(namespace), self.shared.bind(namespace))
+
+    def get(self, key: typing.Hashable) -> tuple[bool, typing.Any]:
+        found, value = self.local.get(key)
+        if not found:
+            found, value = self.shared.get(key)
+            if found:
+                self.local.set(key, value)
+        return found, value
+
+    def set(self, key: typing.Hashable, value: typing.Any) -> None:
+        self.local.set(key, value)
+        self.shared.set(key, value)
+
+    def clear(self) -> None:
+        self.local.clear()
+        self.shared.clear()
+
+    def size(self) -> int | None:
+        return self.local.size()
+
+    def evictions(self) -> int | None:
+        return self.local.evictions()
+
+    def memory(self) -> int | None:
+        return self.local.memory()
+
+
+def _sizeof(value: typing.Any) -> int:
+    # the pickled size, a fair estimate of what nested values like Q objects hold
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class _Stats:
+    # the counters of a cached function, the backend keeps the others
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.computes = 0
+        self.compute_time = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def record_compute(self, started: float) -> None:
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.computes += 1
+            self.compute_time += elapsed
+
+    def reset(self) -> None:
+        with self._lock:
+            self.hits = self.misses = self.computes = 0
+            self.compute_time = 0.0
+
+
+# every cached function by name, see `stats`
+registry: "weakref.WeakValueDictionary[str, typing.Callable[..., typing.Any]]" = (
+    weakref.WeakValueDictionary()
+)
+_registry_lock = threading.Lock()
+
+
+def _register(name: str, func: typing.Callable[..., typing.Any]) -> str:
+    # functions sharing a name (the closures of a factory) are told apart with a suffix, so neither one's stats
+    # hide the other's. returns the name the function is registered under
+    with _registry_lock:
+        registered, count = name, 1
+        while registry.get(registered) is not None:
+            count += 1
+            registered = f"{name}#{count}"
+        registry[registered] = func
+    return registered
+
+
+def stats() -> list[CacheStats]:
+    """Returns the stats of every cached function of the process, by name."""
+    return [func.cache_stats() for _, func in sorted(registry.items())]
+
+
+def log_stats(
+    logger: logging.Logger = logger, level: int = logging.INFO
+) -> list[CacheStats]:
+    """Logs the stats of every cached function of the process, one record per function. The stats are also in the
+    `funcache` attribute of the records, for handlers that export metrics.
+
+    Returns:
+        list[CacheStats]: The stats that were logged.
+    """
+    snapshot = stats()
+    for entry in snapshot:
+        logger.log(
+            level,
+            "%s: %d hits, %d misses (%.0f%%), %s evictions, %s/%s results, %s bytes, %.3fs saved",
+            entry.name,
+            entry.hits,
+            entry.misses,
+            entry.hit_rate * 100,
+            entry.evictions,
+            entry.currsize,
+            entry.maxsize,
+            entry.memory,
+            entry.time_saved,
+            extra={"funcache": entry._asdict()},
+        )
+    return snapshot
+
+
+_PUBLISHED_KEY = "funcache:stats"
+
+
+def publish_stats(
+    cache: "str | BaseCache" = "default", timeout: float | None = 300
+) -> None:
+    """Stores the stats of every cached function of the process in a Django cache, where `published_stats` and the
+    `funcache_stats` management command read the stats of every process from.
+
+    Args:
+        cache (str | BaseCache): The alias of a cache in the `CACHES` setting, or a cache. It must be shared by
+            the processes.
+        timeout (float | None): How long, in seconds, the stats are kept, so processes that stopped drop out.
+    """
+    cache = caches[cache] if isinstance(cache, str) else cache
+    process = f"{socket.gethostname()}:{os.getpid()}"
+    cache.set(
+        f"{_PUBLISHED_KEY}:{process}",
+        [entry._asdict() for entry in stats()],
+        timeout,
+    )
+    # the index may lose a process to a concurrent publish, it's added back on the next one
+    processes = cache.get(_PUBLISHED_KEY, set())
+    if process not in processes:
+        cache.set(_PUBLISHED_KEY, processes | {process}, None)
+
+
+def published_stats(
+    cache: "str | BaseCache" = "default",
+) -> dict[str, list[CacheStats]]:
+    """Returns the stats stored with `publish_stats`, by process."""
+    cache = caches[cache] if isinstance(cache, str) else cache
+    processes = cache.get(_PUBLISHED_KEY, set())
+    keys = {f"{_PUBLISHED_KEY}:{process}": process for process in processes}
+    published = cache.get_many(list(keys))
+    if len(published) < len(processes):
+        # forget the processes whose stats expired
+        cache.set(_PUBLISHED_KEY, {keys[key] for key in published}, None)
+    return {
+        keys[key]: [CacheStats(**entry) for entry in entries]
+        for key, entries in sorted(published.items())
+    }
+
+
+class _Flight:
+    # a call computing the value of a key, that the other callers of the key wait for
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: typing.Any = None
+        self.error: BaseException | None = None
+
+
+class _SingleFlight:
+    """Makes sure only one thread at a time computes the value of a key, the others wait for its result."""
+
+    def __init__(self) -> None:
+        self._flights: dict[typing.Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def run(self, key: typing.Hashable, compute: typing.Callable[[], typing.Any]):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+            return flight.value
+        except BaseException as e:
+            # the waiting callers fail with the same error instead of all retrying
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+
+class _AsyncSingleFlight:
+    """`_SingleFlight` for coroutines: one task per key and event loop, the other callers await it."""
+
+    def __init__(self) -> None:
+        self._flights: dict[
+            tuple[asyncio.AbstractEventLoop, typing.Hashable], asyncio.Future
+        ] = {}
+
+    async def run(
+        self,
+        key: typing.Hashable,
+        compute: typing.Callable[[], typing.Awaitable[typing.Any]],
+    ):
+        # a future can only be awaited from its own loop, so flights aren't shared across loops
+        flight_key = (asyncio.get_running_loop(), key)
+        flight = self._flights.get(flight_key)
+        if flight is None:
+            flight = self._flights[flight_key] = asyncio.ensure_future(compute())
+            flight.add_done_callback(lambda _: self._flights.pop(flight_key, None))
+        # shielded, so a cancelled caller doesn't cancel the computation the others wait for
+        return await asyncio.shield(flight)
 
 
 def cached(
     input_serializer: typing.Callable[
-        [list[typing.Any], dict[str, typing.Any]], str
-    ] = lambda args, kwargs: json.dumps({"args": args, "kwargs": kwargs})
+        [tuple[typing.Any, ...], dict[str, typing.Any]], typing.Hashable
+    ] = make_key,
+    maxsize: int | None = 128,
+    ttl: float | None = None,
+    policy: typing.Literal["lru", "fifo"] = "lru",
+    single_flight: bool = False,
+    backend: Backend | None = None,
+    namespace: str | None = None,
 ):
-    cache = {}
+    """Caches the results of the decorated function by its arguments.
+
+    Args:
+        input_serializer (Callable): Turns the arguments of a call into its cache key, `make_key` by default. When it
+            raises `TypeError` the call isn't cached.
+        maxsize (int | None): The maximum number of results kept, None for no limit.
+        ttl (float | None): How long, in seconds, a result is kept, None for no limit.
+        policy ("lru" | "fifo"): Which result is evicted when the cache is full, the least recently used one or
+            the oldest one.
+        backend (Backend | None): Where the results are kept, a `LocalBackend` built from `maxsize`, `ttl` and
+            `policy` by default. See `DjangoBackend` and `TieredBackend` to share the results between workers.
+        single_flight (bool): Whether concurrent calls that miss on the same key wait for the first one to compute
+            the result, instead of all computing it. If it raises, they all raise its error.
+        namespace (str | None): What keeps the results of the function apart from the other functions' in a
+            shared backend, its module and qualified name by default. Pass one to the functions that share their
+            name, like the closures of a factory, when they don't return the same results.
+
+    Coroutine functions are supported, their results are cached rather than the coroutines, and with `single_flight`
+    the concurrent calls of a key await a single task.
+
+    The decorated function gets `cache_info()` and `cache_clear()` methods, like with `functools.lru_cache`, and a
+    `cache_stats()` method returning its `CacheStats`. It's registered in `registry` under its namespace, followed
+    by "#2", "#3"... when other live functions already have that name.
+    """
+    if backend is None:
+        backend = LocalBackend(maxsize, ttl, policy)
 
     def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            key = input_serializer(args, kwargs)
-            if key in cache:
-                return cache[key]
+        name = namespace or f"{func.__module__}.{func.__qualname__}"
+        cache = backend.bind(name)
+        stats = _Stats()
+        if inspect.iscoroutinefunction(func):
+            wrapper = _acached(func, input_serializer, cache, stats, single_flight)
+        else:
+            wrapper = _cached(func, input_serializer, cache, stats, single_flight)
 
-            res = func(*args, **kwargs)
-            cache[key] = res
-            return res
+        def cache_info() -> CacheInfo:
+            return CacheInfo(stats.hits, stats.misses, cache.maxsize, cache.size())
+
+        def cache_stats() -> CacheStats:
+            computes = stats.computes
+            return CacheStats(
+                name=name,
+                hits=stats.hits,
+                misses=stats.misses,
+                evictions=cache.evictions(),
+                currsize=cache.size(),
+                maxsize=cache.maxsize,
+                memory=cache.memory(),
+                compute_time=stats.compute_time,
+                time_saved=(
+                    stats.hits * stats.compute_time / computes if computes else 0.0
+                ),
+            )
+
+        def cache_clear() -> None:
+            cache.clear()
+            stats.reset()
 
+        wrapper.cache_info = cache_info
+        wrapper.cache_stats = cache_stats
+        wrapper.cache_clear = cache_clear
+        name = _register(name, wrapper)
         return wrapper
 
     return decorator
+
+
+def _cached(func, input_serializer, cache: Backend, stats: _Stats, single_flight: bool):
+    flights = _SingleFlight() if single_flight else None
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            key = input_serializer(args, kwargs)
+        except TypeError:
+            return func(*args, **kwargs)
+        found, res = cache.get(key)
+        stats.record(found)
+        if found:
+            return res
+        if flights is None:
+            started = time.perf_counter()
+            res = func(*args, **kwargs)
+            stats.record_compute(started)
+            cache.set(key, res)
+            return res
+
+        def compute():
+            # the previous flight of the key may have finished since the lookup
+            found, res = cache.get(key)
+            if not found:
+                started = time.perf_counter()
+                res = func(*args, **kwargs)
+                stats.record_compute(started)
+                cache.set(key, res)
+            return res
+
+        return flights.run(key, compute)
+
+    return wrapper
+
+
+def _acached(
+    func, input_serializer, cache: Backend, stats: _Stats, single_flight: bool
+):
+    flights = _AsyncSingleFlight() if single_flight else None
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        try:
+            key = input_serializer(args, kwargs)
+        except TypeError:
+            return await func(*args, **kwargs)
+        found, res = cache.get(key)
+        stats.record(found)
+        if found:
+            return res
+        if flights is None:
+            started = time.perf_counter()
+            res = await func(*args, **kwargs)
+            stats.record_compute(started)
+            cache.set(key, res)
+            return res
+
+        async def compute():
+            found, res = cache.get(key)
+            if not found:
+                started = time.perf_counter()
+                res = await func(*args, **kwargs)
+                stats.record_compute(started)
+                cache.set(key, res)
+            return res
+
+        return await flights.run(key, compute)
+
+    return wrapper
@@ -15,11 +15,17 @@
 # and _and conjunctions, or negated using the _not conjunction,
 # to create the final Q object that represents the entire search query.
 
+import uuid
 import typing
+import decimal
+import logging
+import datetime
 from functools import reduce
-from .funcache import cached
-from django.db.models import Q
-from collections.abc import Sequence
+from .funcache import LocalBackend, cached
+from django.db import models
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q, Field, Lookup
+from collections.abc import Sequence, Sized
 
 ConjunctionTypes: typing.TypeAlias = (
     typing.Literal["_or"] | typing.Literal["_and"] | typing.Literal["_not"]
@@ -101,41 +107,679 @@ class QueryStructureError(BaseException):
     pass
 
 
-# make query func
-@cached()
-def makeQuery(query: dict[str, typing.Any], **kwargs: str) -> Q:
-    # Get parent field name, if any
-    parent: str = kwargs.get("parent", "")
+logger = logging.getLogger(__name__)
+
 
-    # Initialize list to store Q objects for each criterion
-    res: list[Q] = []
+# the shape of a filter: its fields, operators and nesting, without the values. a tuple of entries, one per key of
+# the filter: the name of a criterion, (conjunction, shapes of its filters) or (field, shape of its filter)
+Shape: typing.TypeAlias = tuple[typing.Any, ...]
 
+
+def _items(query: typing.Any) -> typing.Iterator[tuple[str, typing.Any]]:
     try:
-        for item, value in query.items():
-            # check if item is a criterion or conjunction
-            criterion = criterions.get(typing.cast(CriterionTypes, item))
-            conjunction = conjunctions.get(typing.cast(ConjunctionTypes, item))
+        return iter(query.items())
+    except AttributeError:
+        raise QueryStructureError(
+            f'expected a citarion or relationship, got a string "{query}"', 400
+        )
+
 
-            if criterion:
-                # If item is a criterion, resolve it and add the resulting Q object to the list
-                res.append(criterion.resolve(parent, value))
+# shapes nested deeper than this aren't cached: comparing nested tuples recurses, deep shapes would exceed the
+# recursion limit when looked up
+_MAX_CACHED_DEPTH = 100
 
-            elif conjunction:
-                # If item is a conjunction, recursively resolve its values and combine them using the conjunction
+
+def _shape(query: typing.Any, values: list[typing.Any]) -> tuple[Shape, int]:
+    # walks the filter once, appending the values of its criteria to `values` in the order they are bound, returns
+    # its shape and how deeply it is nested. nested filters are walked with an explicit stack so deep filters can't
+    # exceed the recursion limit
+    depth = 1
+    shape: list[typing.Any] = []
+    # frames of (whether it walks the filters of a conjunction, what is left to walk, the entries walked so far, and
+    # where to put them once done: the entries of the parent frame, the index and the name to put them under)
+    stack: list[
+        tuple[
+            bool,
+            typing.Iterator[typing.Any],
+            list[typing.Any],
+            list[typing.Any] | None,
+            int,
+            str | None,
+        ]
+    ] = [(False, _items(query), shape, None, 0, None)]
+    while stack:
+        depth = max(depth, len(stack))
+        conjunction, pending, entries, parent, index, name = stack[-1]
+        if conjunction:
+            for element in pending:
+                entries.append(None)
+                stack.append(
+                    (False, _items(element), [], entries, len(entries) - 1, None)
+                )
+                break
+            else:
+                stack.pop()
+                if parent is not None:
+                    parent[index] = (name, tuple(entries))
+            continue
+
+        for item, value in pending:
+            if item in criterions:
+                values.append(value)
+                entries.append(item)
+            elif item in conjunctions:
                 assert isinstance(value, Sequence)
-                res.append(
-                    conjunction.resolve([makeQuery(i, parent=parent) for i in value])
+                entries.append(None)
+                stack.append((True, iter(value), [], entries, len(entries) - 1, item))
+                break
+            else:
+                entries.append(None)
+                stack.append(
+                    (False, _items(value), [], entries, len(entries) - 1, item)
                 )
+                break
+        else:
+            stack.pop()
+            if parent is not None:
+                parent[index] = (
+                    tuple(entries) if name is None else (name, tuple(entries))
+                )
+    return tuple(shape), depth
+
 
+def _walk(shape: Shape, parent: str) -> typing.Iterator[tuple[str | None, str, int]]:
+    # walks a shape depth first without recursing, yields (None, path, depth) for every filter and
+    # (operator, path, depth) for every criterion, in the order `_shape` collected their values
+    pending: list[tuple[typing.Any, str, int]] = [(shape, parent, 1)]
+    while pending:
+        entry, path, depth = pending.pop()
+        if isinstance(entry, str):
+            yield entry, path, depth
+            continue
+        yield None, path, depth
+        children: list[tuple[typing.Any, str, int]] = []
+        for item in entry:
+            if isinstance(item, str):
+                children.append((item, path, depth))
+            elif item[0] in conjunctions:
+                children.extend((child, path, depth + 1) for child in item[1])
             else:
-                # If item is not a criterion or conjunction, treat it as a field name and recursively resolve its value
-                res.append(
-                    makeQuery(value, parent=f"{parent}__{item}" if parent else item)
+                field, child = item
+                children.append(
+                    (child, f"{path}__{field}" if path else str(field), depth + 1)
                 )
+        pending.extend(reversed(children))
 
-        # Combine all Q objects using the _and conjunction
-        return reduce(lambda a, b: a & b, res)
-    except AttributeError:
-        raise QueryStructureError(
-            f'expected a citarion or relationship, got a string "{query}"', 400
+
+class QueryTemplate:
+    """A filter compiled for its shape, that builds the `Q` of any filter of the same shape from its values.
+
+    The shape is turned into a list of steps once, in postfix order: criteria push a `Q` built from the next
+    value, conjunctions and filters pop the `Q`s of their children and push their combination.
+    """
+
+    def __init__(self, shape: Shape, parent: str = "") -> None:
+        self.shape = shape
+        self.steps: list[tuple[typing.Callable[..., Q], typing.Any, int]] = []
+        self._compile(shape, parent)
+
+    def _compile(self, shape: Shape, parent: str) -> None:
+        # a stack of what is left to do, either a step to emit (3-tuples) or a (shape, parent) to compile (2-tuples).
+        # the entries of a shape are pushed in reverse, so their steps are emitted in order
+        pending: list[typing.Any] = [(shape, parent)]
+        while pending:
+            task = pending.pop()
+            if len(task) == 3:
+                self.steps.append(task)
+                continue
+            shape, parent = task
+            # the entries of a filter are combined using the _and conjunction
+            pending.append((_and, None, len(shape)))
+            for entry in reversed(shape):
+                if isinstance(entry, str):
+                    # (resolve, key, 0): consumes a value
+                    pending.append(
+                        (
+                            criterions[typing.cast(CriterionTypes, entry)].resolve,
+                            parent,
+                            0,
+                        )
+                    )
+                elif entry[0] in conjunctions:
+                    name, children = entry
+                    pending.append((conjunctions[name].resolve, None, len(children)))
+                    pending.extend((child, parent) for child in reversed(children))
+                else:
+                    field, child = entry
+                    pending.append((child, f"{parent}__{field}" if parent else field))
+
+    def bind(self, values: typing.Iterable[typing.Any]) -> Q:
+        """Builds the `Q` of the filter of this shape with the given values, in the order `_shape` found them."""
+        values = iter(values)
+        stack: list[Q] = []
+        for combine, key, count in self.steps:
+            if count:
+                items = stack[-count:]
+                del stack[-count:]
+                stack.append(combine(items))
+            elif key is not None:
+                stack.append(combine(key, next(values)))
+            else:
+                # a filter or conjunction without entries
+                stack.append(combine([]))
+        return stack[0]
+
+
+def _and(items: list[Q]) -> Q:
+    return reduce(lambda a, b: a & b, items)
+
+
+def _template_key(
+    args: tuple[typing.Any, ...], kwargs: dict[str, typing.Any]
+) -> typing.Hashable:
+    # shapes are tuples compared by value, so the arguments are their own key. keyword arguments aren't cached,
+    # queryTemplate then raises since it only takes positional ones
+    if kwargs:
+        raise TypeError("queryTemplate takes positional arguments only")
+    return args if len(args) == 2 else (*args, "")
+
+
+@cached(maxsize=1024, input_serializer=_template_key)
+def queryTemplate(shape: Shape, parent: str = "", /) -> QueryTemplate:
+    """Returns the compiled template of a filter shape, compiled once per shape."""
+    return QueryTemplate(shape, parent)
+
+
+class QueryStats(typing.NamedTuple):
+    depth: int  #: how deeply fields and conjunctions are nested
+    predicates: int  #: the number of criteria
+    joins: int  #: the most relations (`__`) a field path of the filter traverses
+    cost: float  #: the estimated cost, see `QueryLimits`
+
+
+class QueryLimits:
+    """Bounds what a filter sent by a client may ask of the database, checked before its `Q` is built.
+
+    A filter's cost adds up, for every criterion, the cost of its operator, `join_cost` per relation its field path
+    traverses and, for `_in` and `_nin`, `in_cost` per value.
+
+    Args:
+        max_depth (int | None): The deepest nesting of fields and conjunctions.
+        max_predicates (int | None): The most criteria in a filter.
+        max_in_size (int | None): The most values of an `_in` or `_nin`.
+        max_joins (int | None): The most relations (`__`) a field path may traverse.
+        max_cost (float | None): The highest estimated cost.
+        restricted (Iterable[str]): Operators that are only allowed on the fields listed for them in `allowed`.
+        allowed (dict[str, Iterable[str]] | None): The field paths each restricted operator is allowed on.
+        costs (dict[str, float] | None): Overrides of the cost of operators.
+        join_cost (float): The cost of a relation.
+        in_cost (float): The cost of a value of an `_in` or `_nin`.
+
+    Limits set to None aren't checked.
+    """
+
+    COSTS: dict[str, float] = {
+        "_eq": 1,
+        "_neq": 1,
+        "_gt": 1,
+        "_gte": 1,
+        "_lt": 1,
+        "_lte": 1,
+        "_in": 1,
+        "_nin": 1,
+        "_contains": 5,
+        "_icontains": 5,
+        "_regex": 10,
+    }
+
+    def __init__(
+        self,
+        max_depth: int | None = 8,
+        max_predicates: int | None = 50,
+        max_in_size: int | None = 500,
+        max_joins: int | None = 3,
+        max_cost: float | None = None,
+        restricted: typing.Iterable[str] = ("_regex", "_icontains", "_contains"),
+        allowed: dict[str, typing.Iterable[str]] | None = None,
+        costs: dict[str, float] | None = None,
+        join_cost: float = 2,
+        in_cost: float = 0.01,
+    ) -> None:
+        self.max_depth = max_depth
+        self.max_predicates = max_predicates
+        self.max_in_size = max_in_size
+        self.max_joins = max_joins
+        self.max_cost = max_cost
+        self.restricted = frozenset(restricted)
+        self.allowed = {
+            operator: frozenset(fields) for operator, fields in (allowed or {}).items()
+        }
+        self.costs = {**self.COSTS, **(costs or {})}
+        self.join_cost = join_cost
+        self.in_cost = in_cost
+
+    def check(self, query: dict[str, typing.Any], parent: str = "") -> QueryStats:
+        """Checks a filter against the limits.
+
+        Returns:
+            QueryStats: What the filter asks of the database.
+
+        Raises:
+            QueryStructureError: If the filter is over a limit, or uses a restricted operator on a field it isn't
+                allowed on.
+        """
+        values: list[typing.Any] = []
+        shape, _ = _shape(query, values)
+        return self._check(shape, values, parent)
+
+    def _check(self, shape: Shape, values: list[typing.Any], parent: str) -> QueryStats:
+        # walks the shape in the order `_shape` collected the values
+        stats = {"depth": 0, "predicates": 0, "joins": 0, "cost": 0.0}
+        remaining = iter(values)
+        for operator, path, depth in _walk(shape, parent):
+            if operator is not None:
+                self._criterion(operator, next(remaining), path, stats)
+                continue
+            if self.max_depth is not None and depth > self.max_depth:
+                self._reject(
+                    f"the filter is nested deeper than {self.max_depth} levels"
+                )
+            stats["depth"] = max(stats["depth"], depth)
+        if self.max_cost is not None and stats["cost"] > self.max_cost:
+            self._reject(
+                f"the filter is too expensive, its cost is over {self.max_cost}"
+            )
+        return QueryStats(**stats)
+
+    def _criterion(
+        self, operator: str, value: typing.Any, path: str, stats: dict[str, typing.Any]
+    ) -> None:
+        stats["predicates"] += 1
+        if (
+            self.max_predicates is not None
+            and stats["predicates"] > self.max_predicates
+        ):
+            self._reject(f"the filter has more than {self.max_predicates} criteria")
+
+        if operator in self.restricted and path not in self.allowed.get(operator, ()):
+            self._reject(f"{operator} is not allowed on {path or 'this field'}")
+
+        joins = path.count("__")
+        if self.max_joins is not None and joins > self.max_joins:
+            self._reject(f"{path} traverses more than {self.max_joins} relations")
+        stats["joins"] = max(stats["joins"], joins)
+
+        cost = self.costs.get(operator, 1) + joins * self.join_cost
+        if operator in ("_in", "_nin"):
+            size = len(value) if isinstance(value, Sized) else 1
+            if self.max_in_size is not None and size > self.max_in_size:
+                self._reject(
+                    f"{operator} on {path} has more than {self.max_in_size} values"
+                )
+            cost += size * self.in_cost
+        stats["cost"] += cost
+
+    def _reject(self, message: str) -> typing.NoReturn:
+        raise QueryStructureError(message, 400)
+
+
+# the operators a b-tree index on the column can serve
+INDEXED_OPERATORS = frozenset(("_eq", "_in", "_gt", "_gte", "_lt", "_lte"))
+
+
+class FilterPolicy:
+    """Lists the field paths of a model clients may filter on, and whether an index serves each of them.
+
+    The paths are derived from `Model._meta` once, when the policy is created (create it at import time or in
+    `AppConfig.ready`): the concrete fields of the model and, up to `max_joins` relations away, of the models
+    its foreign keys, one-to-one and many-to-many fields point to. A path is indexed when its last field is a
+    primary key, is `unique` or `db_index` (foreign keys are by default), or leads a `Meta.indexes` index, a
+    `unique_together` or an unconditional `UniqueConstraint`; many-to-many paths use the indexes of their
+    through table. Only `INDEXED_OPERATORS` can use an index, `_neq`, `_contains`, `_regex`... can't.
+
+    The verdict on a filter only depends on its shape, so it's computed once per shape.
+
+    Args:
+        model (type[Model]): The model the filters apply to.
+        fields (Iterable[str] | None): The only field paths clients may filter on, all the paths by default.
+        exclude (Iterable[str]): Field paths clients may not filter on.
+        indexed (Iterable[str]): Field paths served by indexes Django doesn't know about, e.g. created in a
+            migration with SQL. Every operator is considered served on them.
+        max_joins (int): How many relations a path may traverse.
+        on_unindexed ("reject" | "warn" | "allow"): What to do with a criterion no index can serve: raise a
+            `QueryStructureError`, log a warning, or let it be.
+    """
+
+    def __init__(
+        self,
+        model: type[models.Model],
+        fields: typing.Iterable[str] | None = None,
+        exclude: typing.Iterable[str] = (),
+        indexed: typing.Iterable[str] = (),
+        max_joins: int = 1,
+        on_unindexed: typing.Literal["reject", "warn", "allow"] = "reject",
+    ) -> None:
+        if on_unindexed not in ("reject", "warn", "allow"):
+            raise ValueError(f"unknown on_unindexed {on_unindexed!r}")
+        self.model = model
+        self.on_unindexed = on_unindexed
+        # field path -> the operators an index serves on it
+        self.paths: dict[str, frozenset[str]] = {}
+        self._collect(model, "", max_joins)
+
+        if fields is not None:
+            allowed = set(fields)
+            self.paths = {
+                path: ops for path, ops in self.paths.items() if path in allowed
+            }
+        for path in exclude:
+            self.paths.pop(path, None)
+        all_operators = frozenset(criterions)
+        for path in indexed:
+            if path in self.paths:
+                self.paths[path] = all_operators
+        self._verdicts = LocalBackend(maxsize=1024)
+
+    def _collect(self, model: type[models.Model], prefix: str, joins: int) -> None:
+        indexed = _indexed_fields(model)
+        for field in model._meta.get_fields():
+            if not getattr(field, "concrete", False) and not field.many_to_many:
+                # reverse relations and generic foreign keys
+                continue
+            if field.auto_created and not field.concrete:
+                continue
+
+            path = f"{prefix}{field.name}"
+            served = field.name in indexed or field.many_to_many
+            self.paths[path] = INDEXED_OPERATORS if served else frozenset()
+            if field.is_relation and field.related_model is not None:
+                if field.attname != field.name:
+                    # the column of a foreign key, `author_id`
+                    self.paths[f"{prefix}{field.attname}"] = self.paths[path]
+                if joins > 0 and field.related_model is not model:
+                    self._collect(field.related_model, f"{path}__", joins - 1)
+
+    def check(self, query: dict[str, typing.Any], parent: str = "") -> None:
+        """Checks that a filter only uses field paths of the policy, through operators an index serves.
+
+        Raises:
+            QueryStructureError: If the filter uses a field path that isn't filterable, or one no index serves when
+                `on_unindexed` is "reject".
+        """
+        self._check(*_shape(query, []), parent)
+
+    def _check(self, shape: Shape, depth: int, parent: str) -> None:
+        if depth > _MAX_CACHED_DEPTH:
+            unindexed = self._unindexed(shape, parent)
+        else:
+            key = (shape, parent)
+            found, unindexed = self._verdicts.get(key)
+            if not found:
+                # raises for the paths that aren't filterable, those verdicts aren't cached
+                unindexed = self._unindexed(shape, parent)
+                self._verdicts.set(key, unindexed)
+        if unindexed and self.on_unindexed == "reject":
+            raise QueryStructureError(
+                f"filtering on {', '.join(unindexed)} can't use an index", 400
+            )
+        if unindexed and self.on_unindexed == "warn":
+            logger.warning(
+                "%s filter on %s can't use an index",
+                self.model.__name__,
+                ", ".join(unindexed),
+            )
+
+    def _unindexed(self, shape: Shape, parent: str) -> list[str]:
+        # returns the "path operator" of the criteria no index serves
+        found = []
+        for operator, path, _ in _walk(shape, parent):
+            if operator is None:
+                continue
+            served = self.paths.get(path)
+            if served is None:
+                raise QueryStructureError(
+                    f"{path or 'this field'} can't be filtered on", 400
+                )
+            if operator not in served:
+                found.append(f"{path} {operator}")
+        return found
+
+
+def _indexed_fields(model: type[models.Model]) -> set[str]:
+    # the names of the fields of the model that lead an index
+    meta = model._meta
+    indexed = {
+        field.name
+        for field in meta.concrete_fields
+        if field.primary_key or field.unique or field.db_index
+    }
+    leading: list[typing.Sequence[str]] = [index.fields for index in meta.indexes]
+    leading.extend(meta.unique_together)
+    leading.extend(
+        constraint.fields
+        for constraint in meta.constraints
+        if isinstance(constraint, models.UniqueConstraint)
+        and constraint.condition is None
+    )
+    for fields in leading:
+        if fields:
+            indexed.add(meta.get_field(fields[0].lstrip("-")).name)
+    return indexed
+
+
+# make query func
+def makeQuery(
+    query: dict[str, typing.Any],
+    simplify: bool = False,
+    limits: QueryLimits | None = None,
+    policy: FilterPolicy | None = None,
+    **kwargs: str,
+) -> Q:
+    """Builds the `Q` object of a filter.
+
+    The filter is walked once to split its shape (fields, operators, nesting) from its values. Filters of the same
+    shape share a compiled `QueryTemplate`, that only has to bind the values.
+
+    Args:
+        query (dict): The filter.
+        simplify (bool): Whether to pass the `Q` through `simplifyQuery`, for a smaller WHERE clause. Negations are
+            only folded with a `policy`, whose model tells the lookups through many-to-many relations apart.
+        limits (QueryLimits | None): The limits to check the filter against before building its `Q`, for filters
+            sent by clients.
+        policy (FilterPolicy | None): The field paths the filter may use, checked before building its `Q`.
+
+    Raises:
+        QueryStructureError: If the filter is malformed or over the limits.
+    """
+    # Get parent field name, if any
+    parent: str = kwargs.get("parent", "")
+
+    values: list[typing.Any] = []
+    shape, depth = _shape(query, values)
+    if limits is not None:
+        limits._check(shape, values, parent)
+    if policy is not None:
+        policy._check(shape, depth, parent)
+    if depth > _MAX_CACHED_DEPTH:
+        template = QueryTemplate(shape, parent)
+    else:
+        template = queryTemplate(shape, parent)
+    q = template.bind(values)
+    return simplifyQuery(q, policy and policy.model) if simplify else q
+
+
+# values an equality can be merged into an `__in` with, None isn't one of them: `field=None` means `IS NULL`
+_SCALARS = (
+    str,
+    int,
+    float,
+    decimal.Decimal,
+    uuid.UUID,
+    datetime.date,
+    datetime.time,
+    datetime.timedelta,
+)
+_lookup_names: frozenset[str] | None = None
+
+
+def _lookups() -> frozenset[str]:
+    # the names of the lookups registered on any model field, a path ending with one of them isn't an equality
+    global _lookup_names
+    if _lookup_names is None:
+        names: set[str] = set()
+        fields: list[type[Field]] = [Field]
+        while fields:
+            field = fields.pop()
+            fields.extend(field.__subclasses__())
+            for name, lookup in field.get_lookups().items():
+                if issubclass(lookup, Lookup):
+                    names.add(name)
+        names.discard("exact")
+        _lookup_names = frozenset(names)
+    return _lookup_names
+
+
+def _equality(child: typing.Any) -> str | None:
+    # the field path of an `field=value` child that can be merged into `field__in`, None for other children
+    if not isinstance(child, tuple) or not isinstance(child[1], _SCALARS):
+        return None
+    path = child[0].removesuffix("__exact")
+    if path.rpartition("__")[2] in _lookups():
+        return None
+    return path
+
+
+def _single_valued(model: type[models.Model], path: str) -> bool:
+    # whether a lookup path doesn't go through a many-to-many or reverse foreign key relation
+    for name in path.split("__"):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # a lookup or a transform, or `pk`
+            return True
+        if field.many_to_many or field.one_to_many:
+            return False
+        if field.related_model is None:
+            return True
+        model = field.related_model
+    return True
+
+
+def _all_single_valued(model: type[models.Model], children: list[typing.Any]) -> bool:
+    return all(
+        (
+            _all_single_valued(model, child.children)
+            if isinstance(child, Q)
+            else _single_valued(model, child[0])
+        )
+        for child in children
+    )
+
+
+def _typed(value: typing.Any) -> typing.Any:
+    # what two children are compared on: 1, 1.0 and True are equal but aren't the same predicate
+    if isinstance(value, Q):
+        return (Q, value.connector, value.negated, [_typed(c) for c in value.children])
+    if isinstance(value, (list, tuple)):
+        return (type(value), [_typed(item) for item in value])
+    if isinstance(value, dict):
+        return (dict, [(key, _typed(item)) for key, item in value.items()])
+    return (type(value), value)
+
+
+def simplifyQuery(q: Q, model: type[models.Model] | None = None) -> Q:
+    """Returns an equivalent `Q` with a simpler structure, for a smaller WHERE clause.
+
+    - nested ANDs and ORs are flattened into a single node, and nodes with a single child are unwrapped
+    - negations are folded: a negated node around a single child negates the child, and a negated node whose
+      children are all negated is turned around (`NOT (NOT a AND NOT b)` is `a OR b`)
+    - repeated predicates of an AND or an OR are dropped
+    - equalities on the same field inside an OR are merged into an `__in`
+
+    Negated nodes with a lookup through a many-to-many or reverse foreign key relation are only simplified inside:
+    Django checks each negated lookup through such a relation in its own subquery, where lookups outside a
+    negation share a join. Without the `model` of the `Q` to tell them apart (`tags=1` may be one), no negated
+    node is folded. XOR nodes are left as they are, only their children are simplified.
+    """
+    return typing.cast(Q, _simplify(q, model))
+
+
+def _simplify(node: typing.Any, model: type[models.Model] | None) -> typing.Any:
+    if not isinstance(node, Q):
+        return node
+
+    children = [_simplify(child, model) for child in node.children]
+    connector, negated = node.connector, node.negated
+    if connector not in (Q.AND, Q.OR) or (
+        negated and (model is None or not _all_single_valued(model, children))
+    ):
+        return Q(*children, _connector=connector, _negated=negated)
+
+    # flatten the children with the same connector, and the single child wrappers
+    flat: list[typing.Any] = []
+    for child in children:
+        if (
+            isinstance(child, Q)
+            and not child.negated
+            and (child.connector == connector or len(child.children) == 1)
+        ):
+            flat.extend(child.children)
+        else:
+            flat.append(child)
+
+    # NOT (NOT a AND NOT b) is a OR b, and NOT (NOT a OR NOT b) is a AND b
+    if (
+        negated
+        and len(flat) > 1
+        and all(isinstance(child, Q) and child.negated for child in flat)
+    ):
+        return _simplify(
+            Q(
+                *(_negate(child) for child in flat),
+                _connector=Q.OR if connector == Q.AND else Q.AND,
+            ),
+            model,
         )
+
+    # drop the repeated predicates, children can hold unhashable values so they're compared one by one
+    unique: list[typing.Any] = []
+    seen: list[typing.Any] = []
+    for child in flat:
+        typed = _typed(child)
+        if typed not in seen:
+            seen.append(typed)
+            unique.append(child)
+
+    if connector == Q.OR:
+        unique = _merge_equalities(unique)
+
+    if len(unique) == 1:
+        (child,) = unique
+        if isinstance(child, Q):
+            # a node around a single node is the node, negated if the wrapper was
+            return _negate(child) if negated else child
+        # the connector of a single predicate doesn't matter, AND is the default one
+        connector = Q.AND
+    return Q(*unique, _connector=connector, _negated=negated)
+
+
+def _negate(q: Q) -> Q:
+    return ~q
+
+
+def _merge_equalities(children: list[typing.Any]) -> list[typing.Any]:
+    # field=1 OR field=2 is field__in=[1, 2], the merged child takes the place of the first equality
+    values: dict[str, list[typing.Any]] = {}
+    for child in children:
+        path = _equality(child)
+        if path is not None:
+            values.setdefault(path, []).append(child[1])
+
+    merged: list[typing.Any] = []
+    for child in children:
+        path = _equality(child)
+        if path is None or len(values.get(path, ())) == 1:
+            merged.append(child)
+        elif path in values:
+            merged.append((f"{path}__in", values.pop(path)))
+    return merged
@@ -0,0 +1,47 @@
+import os
+import typing
+import tempfile
+import django
+import pytest
+from django.conf import settings
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    # the models of tests.testapp live in a sqlite file rather than in memory, so the threads of Django's async
+    # ORM see the same database
+    settings.configure(
+        INSTALLED_APPS=[
+            "django.contrib.contenttypes",
+            "django.contrib.auth",
+            "tests.testapp",
+        ],
+        DATABASES={
+            "default": {
+                "ENGINE": "django.db.backends.sqlite3",
+                "NAME": os.path.join(tempfile.mkdtemp(), "db.sqlite3"),
+            }
+        },
+        DEFAULT_AUTO_FIELD="django.db.models.AutoField",
+        USE_TZ=True,
+    )
+    django.setup()
+
+
+@pytest.fixture(scope="session")
+def tables() -> None:
+    from django.apps import apps
+    from django.db import connection
+
+    with connection.schema_editor() as editor:
+        for model in apps.get_app_config("testapp").get_models():
+            editor.create_model(model)
+
+
+@pytest.fixture
+def db(tables: None) -> typing.Iterator[None]:
+    """Gives the test the tables of tests.testapp, emptied once it's done."""
+    from django.apps import apps
+
+    yield
+    for model in apps.get_app_config("testapp").get_models():
+        model._base_manager.all().delete()
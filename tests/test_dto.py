@@ -1,5 +1,10 @@
+import pickle
+import asyncio
 import pytest
 from freeman.utils.dto import *
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from tests.testapp.models import Product, Tag
 
 
 def test_string_validation():
@@ -86,6 +91,32 @@ def test_string_validation():
         rule.validate("123 456 7890")
 
 
+def test_string_character_classes_report_in_order():
+    rule = String(allow_whitespace=False, allow_numeric=False, allow_uppercase=False)
+    with pytest.raises(ValueError, match="contains whitespace characters"):
+        rule.validate("Hello 1")
+    with pytest.raises(ValueError, match="contains numeric characters"):
+        rule.validate("Hello1")
+    with pytest.raises(ValueError, match="contains uppercase characters"):
+        rule.validate("Hello")
+    rule.validate("")
+
+    # the flags can change after the rule is created
+    rule.allow_whitespace = True
+    rule.validate("hello there")
+    rule.allow_lowercase = False
+    with pytest.raises(ValueError, match="contains lowercase characters"):
+        rule.validate("hello")
+    assert rule.toDict()["allow_lowercase"] is False
+
+    rule = String(pattern=r"\d+")
+    assert rule.pattern == r"\d+"
+    rule.pattern = r"[a-z]+"
+    rule.validate("abc")
+    with pytest.raises(ValueError, match="does not match the required pattern"):
+        rule.validate("123")
+
+
 def test_number_validation():
     # Test validating a non-nullable number with no constraints
     rule = Number()
@@ -372,3 +403,488 @@ def test_nested_structured_input():
     MyInput.validate(
         {"name": "rubbie", "age": 21, "order": {"name": "Coke", "price": 120}}
     )
+
+
+def test_compiled_rules_match_validate():
+    def validate_even_length(s: str) -> bool:
+        return len(s) % 2 == 0
+
+    rule = Dictionary(
+        {
+            "username": String(
+                min_length=3, allow_whitespace=False, allow_special_characters=False
+            ),
+            "code": String(
+                nullable=True, pattern=r"\d{3}", validators=[validate_even_length]
+            ),
+            "age": Number(minimum=18, integer_only=True),
+            "active": Boolean(nullable=True),
+            "tags": List(String(max_length=5), max_length=2),
+            "extra": Any([String(), Number()], nullable=True),
+        },
+        _name="user",
+    )
+    validator = rule.compile()
+
+    values = [
+        {"username": "rubbie", "code": "1234", "age": 21, "active": True, "tags": []},
+        {"username": "rubbie", "age": 21, "tags": ["a", "b"], "extra": 2},
+        {"username": "ru", "age": 21, "tags": []},
+        {"username": "ru bbie", "age": 21, "tags": []},
+        {"username": "rubbie", "code": "123", "age": 21, "tags": []},
+        {"username": "rubbie", "age": 17.5, "tags": []},
+        {"username": "rubbie", "age": 21, "tags": ["a", "longer"]},
+        {"username": "rubbie", "age": 21, "tags": [], "extra": True},
+        {"username": "rubbie", "age": 21, "tags": [], "unknown": 1},
+        {"username": "rubbie", "age": 21, "tags": None},
+        None,
+        "not a dictionary",
+    ]
+
+    for value in values:
+        try:
+            rule.validate(value)
+            expected = None
+        except ValueError as e:
+            expected = str(e)
+
+        if expected is None:
+            validator(value)
+        else:
+            with pytest.raises(ValueError) as info:
+                validator(value)
+            assert str(info.value) == expected
+
+
+def test_compiled_custom_rules():
+    class Even(Rule):
+        def validate(self, other):
+            if other % 2:
+                raise ValueError(f"{self.name} is odd")
+
+    with pytest.raises(ValueError, match="is odd"):
+        Even().compile()(3)
+    with pytest.raises(ValueError, match="is odd"):
+        List(Even()).compile()([2, 3])
+
+
+def test_compiled_structured_input():
+    class MyInput(StructuredInput):
+        name = String(min_length=4)
+        age = Number(minimum=18, integer_only=True)
+
+    validator = MyInput.compile()
+    validator({"name": "rubbie", "age": 21})
+
+    with pytest.raises(ValueError, match="age: value: 9 is less than the minimum"):
+        validator({"name": "rubbie", "age": 9})
+
+
+def test_dictionary_validate_many():
+    dictionary = Dictionary(
+        {"name": String(min_length=3), "age": Number(minimum=18)},
+    )
+    errors = dictionary.validate_many(
+        [
+            {"name": "rubbie", "age": 21},
+            {"name": "ru", "age": 9},
+            None,
+            {"name": "rubbie", "age": 21, "email": "rubbie@example.com"},
+            {"name": "rubbie", "age": 17},
+        ]
+    )
+
+    assert list(errors) == [1, 2, 3, 4]
+    assert all(isinstance(e, ValidationError) for e in sum(errors.values(), []))
+    assert [e.path for e in errors[1]] == [["name"], ["age"]]
+    assert [str(e) for e in errors[2]] == [
+        "value is None but nullable flag is set to False"
+    ]
+    assert "unknown keys" in str(errors[3][0])
+    assert [str(e) for e in errors[4]] == [
+        "value.age: 17 is less than the minimum value of 18"
+    ]
+    assert dictionary.validate_many([{"name": "rubbie", "age": 21}]) == {}
+
+
+def test_structured_input_validate_many():
+    class MyInput(StructuredInput):
+        name = String(min_length=4)
+        age = Number(minimum=18, integer_only=True)
+
+    errors = MyInput.validate_many(
+        [{"name": "rubbie", "age": 21}, {"name": "ade", "age": 9}, "rubbie"]
+    )
+
+    assert list(errors) == [1, 2]
+    assert str(errors[1][0]).startswith("name: ")
+    assert str(errors[1][1]).startswith("age: ")
+    assert [str(e) for e in errors[2]] == ["input is not a dictionary"]
+
+
+def test_structured_input_inherits_rules():
+    class Base(StructuredInput):
+        name = String(min_length=4)
+        nickname = String()
+
+    class MyInput(Base):
+        age = Number(minimum=18)
+        nickname = None
+
+    assert [field_name for field_name, _ in MyInput._fields] == ["name", "age"]
+
+    MyInput.validate({"name": "rubbie", "age": 21})
+    with pytest.raises(ValueError, match="name: "):
+        MyInput.validate({"name": "ade", "age": 21})
+
+
+def test_validation_does_not_rename_rules():
+    element = Dictionary({"sku": String(min_length=3)})
+    rule = Dictionary({"items": List(element)}, _name="order")
+
+    with pytest.raises(ValidationError) as info:
+        rule.validate({"items": [{"sku": "abc"}, {"sku": "ab"}]})
+
+    assert info.value.name == "order"
+    assert info.value.path == ["items", 1, "sku"]
+    assert str(info.value) == (
+        "order.items[1].sku 'ab' is shorter than the minimum length of 3"
+    )
+    assert element.name == "value"
+    assert element.rules["sku"].name == "value"
+
+    with pytest.raises(ValidationError, match=r"^order\.items\[0\]\.sku"):
+        rule.compile()({"items": [{"sku": None}]})
+
+
+def test_custom_rule_errors_keep_their_path():
+    class One(Rule):
+        def validate(self, other):
+            if other != 1:
+                raise ValueError(f"{self.name} must be 1")
+
+    rule = Dictionary({"x": One(), "items": List(One())}, _name="body")
+    for validate in (
+        rule.validate,
+        rule.compile(),
+        lambda value: asyncio.run(rule.avalidate(value)),
+    ):
+        with pytest.raises(ValidationError, match=r"^body\.x must be 1$"):
+            validate({"x": 2, "items": []})
+        with pytest.raises(ValidationError, match=r"^body\.items\[1\] must be 1$"):
+            validate({"x": 1, "items": [1, 2]})
+    assert [str(e) for e in rule.collect_errors({"x": 2, "items": [3]})] == [
+        "body.x must be 1",
+        "body.items[0] must be 1",
+    ]
+
+
+def test_rules_are_ordered_once():
+    rule = Dictionary({"code": String(pattern="[A-Z]+"), "age": Number()})
+    any_rule = Any([String(), Number()])
+    state = (vars(rule).copy(), vars(any_rule).copy())
+    rule.validate({"code": "ABC", "age": 1})
+    any_rule.validate(1)
+    any_rule.validate("a")
+    assert (vars(rule), vars(any_rule)) == state
+
+
+def test_collect_errors():
+    rule = Dictionary(
+        {
+            "name": String(min_length=3),
+            "tags": List(String(allow_whitespace=False)),
+            "age": Number(integer_only=True),
+        },
+        _name="user",
+    )
+
+    assert rule.collect_errors({"name": "rubbie", "tags": ["a"], "age": 21}) == []
+
+    errors = rule.collect_errors(
+        {"name": "ru", "tags": ["a", "b c", "d e"], "age": 2.5, "email": "x"}
+    )
+    # the values are checked in the order validate checks them, the cheapest rules first
+    assert [error.toDict() for error in errors] == [
+        {
+            "path": [],
+            "rule": "dictionary",
+            "constraint": "allow_unknown_keys",
+            "code": "unknown_keys",
+            "params": {"keys": {"email"}},
+        },
+        {
+            "path": ["name"],
+            "rule": "string",
+            "constraint": "min_length",
+            "code": "too_short",
+            "params": {"min_length": 3},
+        },
+        {
+            "path": ["age"],
+            "rule": "number",
+            "constraint": "integer_only",
+            "code": "not_integer",
+            "params": {},
+        },
+        {
+            "path": ["tags", 1],
+            "rule": "string",
+            "constraint": "allow_whitespace",
+            "code": "disallowed_characters",
+            "params": {"kind": "whitespace"},
+        },
+        {
+            "path": ["tags", 2],
+            "rule": "string",
+            "constraint": "allow_whitespace",
+            "code": "disallowed_characters",
+            "params": {"kind": "whitespace"},
+        },
+    ]
+    assert str(errors[3]) == (
+        "user.tags[1] 'b c' contains whitespace characters but allow_whitespace flag is set to False"
+    )
+
+    assert [error.code for error in rule.collect_errors(None)] == ["null"]
+
+
+def test_structured_input_collect_errors():
+    class MyInput(StructuredInput):
+        name = String(min_length=4)
+        age = Number(minimum=18)
+
+    errors = MyInput.collect_errors({"name": "ade", "age": 9})
+    assert [error.path for error in errors] == [["name"], ["age"]]
+    assert str(errors[1]) == "age: value: 9 is less than the minimum value of 18"
+    # rendered as validate reports them
+    with pytest.raises(ValueError) as e:
+        MyInput.validate({"name": "adebayo", "age": 9})
+    assert str(e.value) == str(errors[1])
+
+
+def test_validation_errors_of_custom_rules():
+    error = ValidationError("value", "custom", "bad")
+    assert str(error.within("body", "x")) == (
+        "body.x does not meet the bad constraint of custom"
+    )
+    assert error.code == "invalid"
+
+    error = Dictionary({"a": String(min_length=3)}, _name="body").collect_errors(
+        {"a": "ab"}
+    )[0]
+    copy = pickle.loads(pickle.dumps(error))
+    assert (str(copy), copy.toDict()) == (str(error), error.toDict())
+
+
+def test_async_validation():
+    async def is_available(value):
+        await asyncio.sleep(0)
+        return value != "taken"
+
+    rule = Dictionary(
+        rules={
+            "username": String(min_length=3, validators=[is_available]),
+            "tags": List(element_rule=String(validators=[is_available])),
+        },
+        _name="user",
+    )
+    asyncio.run(rule.avalidate({"username": "free", "tags": ["a", "b"]}))
+    with pytest.raises(ValidationError) as e:
+        asyncio.run(rule.avalidate({"username": "taken", "tags": []}))
+    assert str(e.value) == "user.username 'taken' failed validation"
+    with pytest.raises(ValidationError) as e:
+        asyncio.run(rule.avalidate({"username": "free", "tags": ["a", "taken"]}))
+    assert e.value.path == ["tags", 1]
+
+    # sync rules fail first without waiting on the async ones
+    with pytest.raises(ValidationError) as e:
+        asyncio.run(rule.avalidate({"username": "ab", "tags": ["taken"]}))
+    assert e.value.code == "too_short"
+
+    # the sync paths can't await the validators
+    for async_rule in (
+        String(validators=[is_available]),
+        Number(validators=[is_available]),
+    ):
+        with pytest.raises(TypeError, match="use avalidate"):
+            async_rule.validate("taken")
+        with pytest.raises(TypeError, match="use avalidate"):
+            async_rule.compile()
+    with pytest.raises(TypeError, match="use avalidate"):
+        rule.validate({"username": "taken", "tags": []})
+    with pytest.raises(TypeError, match="use avalidate"):
+        String(validators=[lambda value: is_available(value)]).validate("taken")
+
+    # the validators are checked for coroutine functions when they are set
+    sync_rule = String(validators=[str.isalpha])
+    sync_rule.validate("taken")
+    sync_rule.validators = [str.isalpha, is_available]
+    assert sync_rule.validators == (str.isalpha, is_available)
+    with pytest.raises(TypeError, match="use avalidate"):
+        sync_rule.validate("taken")
+    sync_rule.validators = None
+    sync_rule.validate("taken")
+
+    class MyInput(StructuredInput):
+        username = String(validators=[is_available])
+
+    asyncio.run(MyInput.avalidate({"username": "free"}))
+    with pytest.raises(ValueError, match="username"):
+        asyncio.run(MyInput.avalidate({"username": "taken"}))
+
+
+def test_rules_run_cheapest_first():
+    calls = []
+
+    def validator(value):
+        calls.append(value)
+        return True
+
+    rule = Dictionary(
+        rules={
+            "code": String(pattern=r"[A-Z]{3}", validators=[validator]),
+            "age": Number(),
+        }
+    )
+    for validate in (rule.validate, rule.compile()):
+        with pytest.raises(ValidationError) as e:
+            validate({"code": "ABC", "age": "ten"})
+        assert e.value.path == ["age"]
+    assert calls == []
+
+    rule.add_rules({"name": String(min_length=3)})
+    with pytest.raises(ValidationError) as e:
+        rule.validate({"code": "ABC", "age": 10, "name": "ab"})
+    assert e.value.path == ["name"]
+    assert calls == []
+
+    class MyInput(StructuredInput):
+        code = String(validators=[validator])
+        age = Number()
+
+    with pytest.raises(ValueError, match="age"):
+        MyInput.validate({"code": "ABC", "age": "ten"})
+    assert calls == []
+
+
+def test_rules_are_read_only_views():
+    rule = Dictionary({"a": String()})
+    with pytest.raises(TypeError):
+        rule.rules["b"] = Number()
+    choice = Any([String(), Number()])
+    with pytest.raises(AttributeError):
+        choice.rules.append(Boolean())
+
+    # the rules change by assigning them, so they are all validated and known
+    rule.rules = {**rule.rules, "b": Number()}
+    with pytest.raises(ValidationError) as e:
+        rule.validate({"a": "x", "b": "ten"})
+    assert e.value.path == ["b"]
+    assert [error.path for error in rule.collect_errors({"b": "ten"})] == [
+        ["a"],
+        ["b"],
+    ]
+    assert list(rule.validate_many([{"a": "x", "b": "ten"}])) == [0]
+
+    choice.rules = [*choice.rules, Boolean()]
+    choice.validate(True)
+
+
+def test_any_dispatches_on_type():
+    class CountingNumber(Number):
+        calls = 0
+
+        def validate(self, other):
+            CountingNumber.calls += 1
+            super().validate(other)
+
+    for dispatch, calls in ((True, 0), (False, 2)):
+        CountingNumber.calls = 0
+        rule = Any([CountingNumber(), String(min_length=3)], dispatch=dispatch)
+        rule.validate("hello")
+        with pytest.raises(ValidationError):
+            rule.validate("hi")
+        assert CountingNumber.calls == calls
+        rule.validate(3)
+        rule.compile()(3)
+        with pytest.raises(ValidationError):
+            rule.compile()(["hello"])
+
+
+def test_model_lookups(db):
+    Tag.objects.create(name="red")
+    Product.objects.create(sku="a", attributes={"size": 1})
+    tag = Model(Tag, "name")
+    attributes = Model(Product, "attributes")
+
+    # the database compares the values, with its collations
+    assert tag.exists("RED") and asyncio.run(tag.aexists("RED"))
+    assert not tag.exists("blue") and not asyncio.run(tag.aexists("blue"))
+    assert tag.missing(["Red", "blue", "red", "blue"]) == ["blue", "blue"]
+    assert attributes.missing([{"size": 1}, {"size": 2}]) == [{"size": 2}]
+
+    with CaptureQueriesContext(connection) as queries:
+        assert tag.missing([f"tag {i}" for i in range(150)] + ["red"]) == [
+            f"tag {i}" for i in range(150)
+        ]
+    assert len(queries) == 2
+
+    # the first invalid index is reported, whether it's missing or None
+    rule = List(tag)
+    for validate in (rule.validate, lambda v: asyncio.run(rule.avalidate(v))):
+        with pytest.raises(ValidationError) as e:
+            validate(["red", "blue", None])
+        assert (e.value.path, e.value.code) == ([1], "does_not_exist")
+        with pytest.raises(ValidationError) as e:
+            validate(["red", None, "blue"])
+        assert (e.value.path, e.value.code) == ([1], "null")
+
+
+def test_validate_many_looks_model_columns_up_at_once(db):
+    Tag.objects.create(name="red")
+    rule = Dictionary({"tag": Model(Tag, "name"), "count": Number()})
+    records = [{"tag": "red", "count": 1} for _ in range(50)]
+    records[7] = {"tag": "blue", "count": 1}
+    records[9] = {"tag": None, "count": 1}
+
+    with CaptureQueriesContext(connection) as queries:
+        errors = rule.validate_many(records)
+    assert len(queries) == 1
+    assert list(errors) == [7, 9]
+    assert [(e.path, e.code) for e in errors[7]] == [(["tag"], "does_not_exist")]
+    assert [(e.path, e.code) for e in errors[9]] == [(["tag"], "null")]
+
+    class MyInput(StructuredInput):
+        tag = Model(Tag, "name")
+
+    with CaptureQueriesContext(connection) as queries:
+        errors = MyInput.validate_many([{"tag": "red"}, {"tag": "blue"}] * 20)
+    assert len(queries) == 1
+    assert list(errors) == list(range(1, 40, 2))
+    assert str(errors[1][0]).startswith("tag: ")
+
+
+def test_model_lookups_fetch_matching_values(db):
+    Product.objects.bulk_create([Product(sku=f"p{i}", price=i) for i in range(500)])
+    sku = Model(Product, "sku")
+
+    with CaptureQueriesContext(connection) as queries:
+        assert sku.missing([f"p{i}" for i in range(500)] + ["x", "p1"]) == ["x"]
+    # a single IN query, checked without the conditional counts
+    assert len(queries) == 1
+    assert "COUNT" not in queries[0]["sql"]
+
+    # values the field can't hold don't match, whether they are looked up one by one or in bulk
+    for rule, value in (
+        (Model(Product, "id"), "abc"),
+        (Model(Product, "price"), "abc"),
+    ):
+        assert not rule.exists(value) and not asyncio.run(rule.aexists(value))
+        for validate in (rule.validate, lambda v: asyncio.run(rule.avalidate(v))):
+            with pytest.raises(ValidationError) as e:
+                validate(value)
+            assert e.value.code == "does_not_exist"
+        assert rule.missing([value]) == [value]
+    assert Model(Product, "price").exists("7")
+    assert asyncio.run(Model(Product, "sku")._afind(["p1", "x"])) == [True, False]
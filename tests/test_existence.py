@@ -0,0 +1,113 @@
+import time
+import threading
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from freeman.utils.dto import Model
+from freeman.utils.existence import *
+from freeman.utils.existence import _invalidate
+from tests.testapp import models
+
+KEY = ("shop.product", "sku", "None")
+
+
+class Product:
+    class _meta:
+        label_lower = "shop.product"
+
+
+def test_process_cache_evicts_least_recently_used():
+    cache = ProcessExistenceCache(maxsize=2, ttl=None)
+    cache.add(KEY, ["a", "b"], generation(KEY))
+    assert cache.contains(KEY, "a")
+
+    cache.add(KEY, ["c"], generation(KEY))
+    assert cache.contains(KEY, "a")
+    assert cache.contains(KEY, "c")
+    assert not cache.contains(KEY, "b")
+
+
+def test_process_cache_expires_values():
+    cache = ProcessExistenceCache(ttl=0.01)
+    cache.add(KEY, ["a"], generation(KEY))
+    assert cache.contains(KEY, "a")
+
+    time.sleep(0.02)
+    assert not cache.contains(KEY, "a")
+
+
+def test_caches_are_invalidated_by_model_changes():
+    cache = ProcessExistenceCache()
+    cache.add(KEY, ["a"], generation(KEY))
+
+    _invalidate(Product, created=True)
+    assert cache.contains(KEY, "a")
+
+    _invalidate(Product)
+    assert not cache.contains(KEY, "a")
+
+
+def test_request_cache_is_scoped():
+    cache = RequestExistenceCache()
+    cache.add(KEY, ["a"], generation(KEY))
+    assert not cache.contains(KEY, "a")
+
+    with request_scope():
+        cache.add(KEY, ["a"], generation(KEY))
+        assert cache.contains(KEY, "a")
+
+        with request_scope():
+            assert not cache.contains(KEY, "a")
+
+        # stored under an older generation
+        cache.add(KEY, ["b"], generation(KEY) - 1)
+        assert not cache.contains(KEY, "b")
+
+    assert not cache.contains(KEY, "a")
+
+
+def test_existence_cache_is_abstract():
+    with pytest.raises(TypeError):
+        ExistenceCache()
+
+
+def test_concurrent_invalidations_are_counted():
+    before = generation(KEY)
+
+    def invalidate():
+        for _ in range(2000):
+            _invalidate(Product)
+
+    threads = [threading.Thread(target=invalidate) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert generation(KEY) == before + 8 * 2000
+
+
+def test_model_cache_follows_signals(db):
+    product = models.Product.objects.create(sku="a")
+    rule = Model(models.Product, "sku", cache=ProcessExistenceCache())
+
+    with CaptureQueriesContext(connection) as queries:
+        rule.validate("a")
+        rule.validate("a")
+        assert rule.missing(["a"]) == []
+    assert len(queries) == 1
+
+    # creating a record doesn't invalidate, saving or deleting one does
+    models.Product.objects.create(sku="b")
+    with CaptureQueriesContext(connection) as queries:
+        rule.validate("a")
+    assert len(queries) == 0
+
+    product.price = 10
+    product.save()
+    with CaptureQueriesContext(connection) as queries:
+        rule.validate("a")
+    assert len(queries) == 1
+
+    product.delete()
+    with pytest.raises(ValueError):
+        rule.validate("a")
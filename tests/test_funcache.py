@@ -0,0 +1,462 @@
+import os
+import sys
+import time
+import uuid
+import asyncio
+import logging
+import datetime
+import collections
+import threading
+import subprocess
+import pytest
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.filebased import FileBasedCache
+from freeman.utils.funcache import (
+    Backend,
+    DjangoBackend,
+    LocalBackend,
+    TieredBackend,
+    cached,
+    log_stats,
+    make_key,
+    pickle_key,
+    publish_stats,
+    published_stats,
+    registry,
+)
+
+
+def test_cached_returns_cached_results():
+    calls = []
+
+    @cached()
+    def double(x):
+        calls.append(x)
+        return x * 2
+
+    assert double(2) == 4
+    assert double(2) == 4
+    assert double(x=2) == 4
+    assert calls == [2, 2]
+    assert double.cache_info() == (1, 2, 128, 2)
+
+    double.cache_clear()
+    assert double.cache_info() == (0, 0, 128, 0)
+    assert double(2) == 4
+    assert calls == [2, 2, 2]
+
+
+def test_cached_lru_eviction():
+    calls = []
+
+    @cached(maxsize=2)
+    def identity(x):
+        calls.append(x)
+        return x
+
+    identity(1)
+    identity(2)
+    identity(1)  # 2 is now the least recently used
+    identity(3)
+    assert identity.cache_info().currsize == 2
+    identity(1)
+    identity(2)
+    assert calls == [1, 2, 3, 2]
+
+
+def test_cached_fifo_eviction():
+    calls = []
+
+    @cached(maxsize=2, policy="fifo")
+    def identity(x):
+        calls.append(x)
+        return x
+
+    identity(1)
+    identity(2)
+    identity(1)  # reading doesn't save 1 from being the oldest
+    identity(3)
+    identity(2)
+    identity(1)
+    assert calls == [1, 2, 3, 1]
+
+    with pytest.raises(ValueError):
+        cached(policy="random")
+
+
+def test_cached_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    calls = []
+
+    @cached(ttl=10)
+    def identity(x):
+        calls.append(x)
+        return x
+
+    identity(1)
+    now[0] += 5
+    identity(1)
+    now[0] += 6
+    identity(1)
+    assert calls == [1, 1]
+    assert identity.cache_info().currsize == 1
+
+
+def test_cached_unbounded():
+    @cached(maxsize=None)
+    def identity(x):
+        return x
+
+    for i in range(1000):
+        identity(i)
+    assert identity.cache_info() == (0, 1000, None, 1000)
+
+
+def test_make_key():
+    assert make_key(({"a": [1, {"b": "c"}]},), {}) == make_key(
+        ({"a": [1, {"b": "c"}]},), {}
+    )
+    assert make_key(({"a": 1, "b": 2},), {}) != make_key(({"b": 2, "a": 1},), {})
+    assert make_key(([1, 2],), {}) != make_key(([2, 1],), {})
+    assert len({make_key((value,), {}) for value in (1, 1.0, True, "1")}) == 4
+    assert make_key(([1],), {}) != make_key(((1,),), {})
+    assert make_key((1,), {"parent": "a"}) != make_key((1,), {"parent": "b"})
+
+    # equal arguments share a key whether or not they share objects
+    shared = "x" * 20
+    distinct = ["".join(["x"] * 20) for _ in range(2)]
+    assert distinct[0] is not distinct[1]
+    assert make_key(([shared, shared],), {}) == make_key((distinct,), {})
+    when = datetime.datetime(2024, 1, 1)
+    assert pickle_key(make_key(([when, shared, shared],), {})) == pickle_key(
+        make_key(([when, *distinct],), {})
+    )
+    # and so do equal sets iterating in another order
+    assert list({8, 16}) != list({16, 8})
+    assert make_key(({8, 16},), {}) == make_key(({16, 8},), {})
+    assert make_key((frozenset([8, 16]),), {}) == make_key((frozenset([16, 8]),), {})
+    assert make_key(({"a": 1},), {}) != make_key((collections.OrderedDict(a=1),), {})
+
+
+def test_cached_non_json_arguments():
+    calls = []
+
+    @cached()
+    def identity(x, **kwargs):
+        calls.append(x)
+        return x
+
+    moment = datetime.datetime(2023, 1, 1)
+    key = uuid.uuid4()
+    identity({"created": {"_gte": moment}, "id": key})
+    identity({"created": {"_gte": moment}, "id": key})
+    assert len(calls) == 1
+
+    # unhashable values that aren't containers can't be keyed, the calls still go through
+    class Unhashable:
+        __hash__ = None
+
+    value = Unhashable()
+    assert identity(value) is value
+    assert identity(x=[value]) == [value]
+    assert len(calls) == 3
+
+
+def test_cached_single_flight():
+    calls = []
+    started = threading.Event()
+
+    @cached(single_flight=True)
+    def slow(x):
+        calls.append(x)
+        started.set()
+        time.sleep(0.05)
+        if x == "fail":
+            raise ValueError(x)
+        return x
+
+    def call(x, results):
+        try:
+            results.append(slow(x))
+        except ValueError as e:
+            results.append(e)
+
+    for x in ("ok", "fail"):
+        started.clear()
+        results = []
+        first = threading.Thread(target=call, args=(x, results))
+        first.start()
+        started.wait()
+        others = [threading.Thread(target=call, args=(x, results)) for _ in range(7)]
+        for thread in others:
+            thread.start()
+        for thread in [first, *others]:
+            thread.join()
+        assert len(results) == 8
+        assert len({id(result) for result in results}) == 1
+    assert calls == ["ok", "fail"]
+
+
+def test_cached_coroutine_function():
+    calls = []
+
+    @cached(single_flight=True)
+    async def slow(x):
+        calls.append(x)
+        await asyncio.sleep(0.01)
+        return [x]
+
+    async def main():
+        results = await asyncio.gather(*(slow(1) for _ in range(5)))
+        assert results == [[1]] * 5
+        assert await slow(1) is results[0]
+
+    asyncio.run(main())
+    assert calls == [1]
+    assert slow.cache_info().hits == 1
+
+    @cached()
+    async def plain(x):
+        calls.append(x)
+        return x
+
+    assert asyncio.run(plain(2)) == asyncio.run(plain(2)) == 2
+    assert calls == [1, 2]
+
+
+def shared_function(backend, calls):
+    # the same function in two workers
+    @cached(backend=backend)
+    def query(filters):
+        calls.append(filters)
+        return {"filters": filters}
+
+    return query
+
+
+@pytest.mark.parametrize("kind", ["locmem", "filebased"])
+def test_cached_django_backend(kind, tmp_path):
+    if kind == "locmem":
+        cache = LocMemCache("funcache", {})
+    else:
+        cache = FileBasedCache(str(tmp_path), {})
+    calls = []
+    first = shared_function(DjangoBackend(cache, generation_ttl=0), calls)
+    second = shared_function(DjangoBackend(cache, generation_ttl=0), calls)
+
+    assert first({"a": {"_eq": 1}}) == {"filters": {"a": {"_eq": 1}}}
+    assert second({"a": {"_eq": 1}}) == {"filters": {"a": {"_eq": 1}}}
+    assert len(calls) == 1
+    assert second.cache_info().hits == 1
+
+    # clearing one worker's cache clears the others'
+    second.cache_clear()
+    first({"a": {"_eq": 1}})
+    assert len(calls) == 2
+
+    # another version doesn't see the results of the previous one
+    third = shared_function(DjangoBackend(cache, version=2), calls)
+    third({"a": {"_eq": 1}})
+    assert len(calls) == 3
+
+    # and another function doesn't see them either
+    @cached(backend=DjangoBackend(cache))
+    def other(filters):
+        calls.append(filters)
+
+    other({"a": {"_eq": 1}})
+    assert len(calls) == 4
+
+
+class CountingCache(LocMemCache):
+    def __init__(self, name):
+        super().__init__(name, {})
+        self.reads = 0
+
+    def get(self, *args, **kwargs):
+        self.reads += 1
+        return super().get(*args, **kwargs)
+
+
+def test_django_backend_generation_reads():
+    cache = CountingCache("funcache-generation")
+    calls = []
+    first = shared_function(DjangoBackend(cache, generation_ttl=0.2), calls)
+    second = shared_function(DjangoBackend(cache, generation_ttl=0.2), calls)
+
+    # the generation is read by the first lookup only, then each lookup is one read
+    first(1)
+    first(1)
+    first(2)
+    assert cache.reads == 4
+    assert len(calls) == 2
+
+    # the process clearing its results stops returning them at once, the others after generation_ttl
+    second(1)
+    second.cache_clear()
+    second(1)
+    first(1)
+    assert len(calls) == 3
+    time.sleep(0.2)
+    first(1)
+    assert len(calls) == 3
+    first(2)
+    assert len(calls) == 4
+
+
+def test_django_backend_ttl():
+    # the ttl is Django's timeout: None never expires, a number expires after that many seconds
+    cache = LocMemCache("funcache-ttl", {"TIMEOUT": 0.1})
+    DjangoBackend(cache).set("forever", 1)
+    DjangoBackend(cache, ttl=0.1).set("briefly", 2)
+    time.sleep(0.15)
+    assert DjangoBackend(cache).get("forever") == (True, 1)
+    assert DjangoBackend(cache).get("briefly") == (False, None)
+
+    # a backend has to store results
+    class Incomplete(Backend):
+        def get(self, key):
+            return False, None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_cached_namespace():
+    cache = LocMemCache("funcache-namespace", {})
+
+    def factory(multiplier, namespace=None):
+        @cached(backend=DjangoBackend(cache), namespace=namespace)
+        def multiply(x):
+            return x * multiplier
+
+        return multiply
+
+    # closures of a factory share a namespace unless they are given their own
+    assert factory(2)(1) == 2
+    assert factory(3)(1) == 2
+    assert factory(4, namespace="times-4")(1) == 4
+    times_5 = factory(5, namespace="times-5")
+    assert times_5(1) == 5
+    assert times_5.cache_stats().name == "times-5"
+    assert factory(5, namespace="times-5").cache_stats().name == "times-5#2"
+    assert (
+        factory(2)
+        .cache_stats()
+        .name.startswith(
+            f"{__name__}.test_cached_namespace.<locals>.factory.<locals>.multiply"
+        )
+    )
+
+
+def test_cached_tiered_backend():
+    shared = LocMemCache("funcache-tiered", {})
+    calls = []
+    first = shared_function(TieredBackend(LocalBackend(), DjangoBackend(shared)), calls)
+    second = shared_function(
+        TieredBackend(LocalBackend(), DjangoBackend(shared)), calls
+    )
+
+    first(1)
+    second(1)
+    assert len(calls) == 1
+    assert second.cache_info().currsize == 1
+
+    # the local tier answers without the shared one
+    shared.clear()
+    second(1)
+    assert len(calls) == 1
+
+
+def test_pickle_key_is_stable_across_processes():
+    key = make_key(({"a": {"_in": frozenset(["x", "y", "z"])}},), {"parent": "p"})
+    script = (
+        "from freeman.utils.funcache import make_key, pickle_key; "
+        "print(pickle_key(make_key(({'a': {'_in': frozenset(['x', 'y', 'z'])}},), {'parent': 'p'})))"
+    )
+    for seed in ("1", "2"):
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            capture_output=True,
+            text=True,
+            check=True,
+            env={**os.environ, "PYTHONHASHSEED": seed},
+        )
+        assert result.stdout.strip() == pickle_key(key)
+
+
+def test_cache_stats(caplog):
+    @cached(maxsize=2)
+    def slow(x):
+        time.sleep(0.01)
+        return [x] * 100
+
+    for x in (1, 1, 1, 2, 3):
+        slow(x)
+    stats = slow.cache_stats()
+    assert stats.name == f"{__name__}.test_cache_stats.<locals>.slow"
+    assert (stats.hits, stats.misses, stats.evictions) == (2, 3, 1)
+    assert (stats.currsize, stats.maxsize) == (2, 2)
+    assert stats.memory > 200
+    assert stats.compute_time >= 0.03
+    assert stats.time_saved == pytest.approx(2 * stats.compute_time / 3)
+    assert stats.hit_rate == 0.4
+    assert registry[stats.name] is slow
+
+    with caplog.at_level(logging.INFO, logger="freeman.utils.funcache"):
+        logged = log_stats()
+    assert stats.name in [entry.name for entry in logged]
+    record = next(r for r in caplog.records if r.funcache["name"] == stats.name)
+    assert record.funcache["hits"] == 2
+
+    slow.cache_clear()
+    assert slow.cache_stats()[1:5] == (0, 0, 0, 0)
+
+
+def test_registry_keeps_same_name_functions_apart():
+    def make(module):
+        # the same function defined in two modules
+        namespace = {"__name__": module, "cached": cached}
+        exec("@cached()\ndef lookup(x):\n    return x", namespace)
+        return namespace["lookup"]
+
+    first, second = make("tests.first"), make("tests.second")
+    first(1)
+    second(1)
+    second(1)
+    assert registry["tests.first.lookup"] is first
+    assert registry["tests.second.lookup"] is second
+    assert first.cache_stats().hits == 0
+    assert second.cache_stats().hits == 1
+
+    def factory():
+        @cached()
+        def closure(x):
+            return x
+
+        return closure
+
+    one, two = factory(), factory()
+    two(1)
+    assert (
+        one.cache_stats().name == f"{__name__}.{factory.__qualname__}.<locals>.closure"
+    )
+    assert two.cache_stats().name == f"{one.cache_stats().name}#2"
+    assert registry[two.cache_stats().name] is two
+    assert (one.cache_stats().misses, two.cache_stats().misses) == (0, 1)
+
+
+def test_publish_stats():
+    shared = LocMemCache("funcache-stats", {})
+
+    @cached()
+    def published(x):
+        return x
+
+    published(1)
+    published(1)
+    publish_stats(shared)
+    (entries,) = published_stats(shared).values()
+    entry = next(entry for entry in entries if entry.name.endswith(".published"))
+    assert (entry.hits, entry.misses) == (1, 1)
@@ -0,0 +1,254 @@
+import json
+import uuid
+import base64
+import pytest
+from django.db import connection
+from django.db.models import F, Q
+from django.db.models.signals import post_save
+from django.test.utils import CaptureQueriesContext
+from tests.testapp.models import Product, Tag
+
+
+def create_products() -> list[Product]:
+    # prices and names repeat, so the primary key breaks the ties
+    return [
+        Product.objects.create(sku=f"p{i}", price=i % 3, name="ab"[i % 2])
+        for i in range(10)
+    ]
+
+
+def pages(order_by, limit=3, where=Q()):
+    found, after = [], None
+    while True:
+        page = Product.findPage(where, limit, after, order_by)
+        assert len(page.items) <= limit
+        found.extend(page.items)
+        if page.cursor is None:
+            return found
+        after = page.cursor
+
+
+def test_find_page(db):
+    create_products()
+    for order_by in [
+        ("date_created", "id"),
+        ("-price", "name"),
+        ("price", "-name"),
+        ("-price", "-name", "-id"),
+        ("name", "-pk"),
+    ]:
+        ordering = [name.replace("pk", "id") for name in order_by]
+        if not any(name.lstrip("-") == "id" for name in ordering):
+            ordering.append("id")
+        assert pages(order_by) == list(Product.objects.order_by(*ordering))
+
+    cheap = pages(("-price", "name"), limit=1, where=Q(price__lt=2))
+    assert cheap == list(
+        Product.objects.filter(price__lt=2).order_by("-price", "name", "id")
+    )
+    assert Product.findPage(Q(), 10, order_by=("price",)).cursor is None
+
+
+def test_find_page_rejects_bad_orderings_and_cursors(db, monkeypatch):
+    create_products()
+    for order_by in [("tags__name",), ("tags",), ("stock",), ("-price", "sku__len")]:
+        with pytest.raises(ValueError):
+            Product.findPage(Q(), 3, order_by=order_by)
+    for limit in (0, -1):
+        with pytest.raises(ValueError, match="at least one"):
+            Product.findPage(Q(), limit)
+    monkeypatch.setattr(Product._meta.get_field("price"), "null", True)
+    with pytest.raises(ValueError, match="can be null"):
+        Product.findPage(Q(), 3, order_by=("-price", "name"))
+    monkeypatch.undo()
+
+    cursor = Product.findPage(Q(), 3, order_by=("-price", "name")).cursor
+    Product.findPage(Q(), 3, cursor, ("-price", "name"))
+    with pytest.raises(ValueError, match="another ordering"):
+        Product.findPage(Q(), 3, cursor, ("price", "name"))
+
+    def encode(value) -> str:
+        return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+    names = ["-price", "name", "id"]
+    for bad in [
+        "not a cursor!",
+        "e30",  # {} once decoded
+        base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+        encode([names, [1, "a"]]),
+        encode([names, ["cheap", "a", "3f1c"]]),
+        encode([names, [1, "a", "not a uuid"]]),
+        encode(names),
+    ]:
+        with pytest.raises(ValueError):
+            Product.findPage(Q(), 3, bad, ("-price", "name"))
+
+
+def test_update_many(db):
+    products = create_products()[:3]
+    updates = [
+        {"pk": products[0].pk, "_set": {"price": 10}},
+        {"pk": str(products[1].pk), "_set": {"name": "z"}},
+        {"pk": products[2].pk, "_set": {"price": 12, "name": "y"}},
+    ]
+    with CaptureQueriesContext(connection) as queries:
+        updated = Product.updateMany(updates)
+    # one SELECT and one UPDATE, in a transaction
+    assert [query["sql"].split()[0] for query in queries] == [
+        "BEGIN",
+        "SELECT",
+        "UPDATE",
+        "COMMIT",
+    ]
+    assert [(p.price, p.name) for p in updated] == [(10, "a"), (1, "z"), (12, "y")]
+    assert [
+        (p.price, p.name) for p in Product.objects.filter(sku__in=["p0", "p1", "p2"])
+    ] == [(10, "a"), (1, "z"), (12, "y")]
+
+    with pytest.raises(Product.DoesNotExist):
+        Product.updateMany(
+            [
+                {"pk": products[0].pk, "_set": {"price": 20}},
+                {"pk": uuid.uuid4(), "_set": {"price": 20}},
+            ]
+        )
+    assert Product.objects.get(pk=products[0].pk).price == 10
+
+
+@pytest.mark.parametrize("native", [True, False])
+def test_upsert_many(db, monkeypatch, native):
+    # without update_conflicts, the rows that exist are updated with bulk_update
+    monkeypatch.setattr(connection.features, "supports_update_conflicts", native)
+    Product.objects.create(sku="a", name="old", price=5, attributes={"size": 1})
+    Product.objects.create(sku="b", name="old", price=5)
+
+    objects = [
+        {"sku": "a", "price": 7},
+        {"sku": "b", "name": "new", "attributes": {"size": 2}},
+        {"sku": "c", "name": "new", "price": 1},
+        {"sku": "d"},
+    ]
+    with CaptureQueriesContext(connection) as queries:
+        assert Product.upsertMany(objects, ["sku"]) == (2, 2)
+    selects = [query for query in queries if query["sql"].startswith("SELECT")]
+    # the keys of the rows that exist, then the rows themselves to update them with bulk_update
+    assert len(selects) == (1 if native else 2)
+    assert '"testapp_product"."name"' not in selects[0]["sql"]
+
+    # the fields an object leaves out keep their value
+    rows = Product.objects.order_by("sku").values_list(
+        "sku", "name", "price", "attributes"
+    )
+    assert list(rows) == [
+        ("a", "old", 7, {"size": 1}),
+        ("b", "new", 5, {"size": 2}),
+        ("c", "new", 1, {}),
+        ("d", "", 0, {}),
+    ]
+
+    objects = [{"sku": "a", "name": "newer"}, {"sku": "d", "price": 3, "name": "x"}]
+    assert Product.upsertMany(objects, ["sku"], update_fields=["price"]) == (0, 2)
+    rows = Product.objects.filter(sku__in=["a", "d"]).order_by("sku")
+    assert list(rows.values_list("sku", "name", "price")) == [
+        ("a", "old", 7),
+        ("d", "", 3),
+    ]
+
+    # an object repeating a key replaces the earlier ones, its row is counted once
+    objects = [
+        {"sku": "a", "price": 8},
+        {"sku": "e", "price": 1},
+        {"sku": "a", "price": 9},
+        {"sku": "e", "price": 2},
+    ]
+    assert Product.upsertMany(objects, ["sku"]) == (1, 1)
+    rows = Product.objects.filter(sku__in=["a", "e"]).order_by("sku")
+    assert list(rows.values_list("sku", "price")) == [("a", 9), ("e", 2)]
+
+
+@pytest.mark.parametrize("signals", [True, False])
+def test_update_one_fast(db, signals):
+    product = Product.objects.create(sku="a", name="old", price=5)
+    saved = []
+    post_save.connect(
+        lambda instance, **kwargs: saved.append(instance),
+        Product,
+        weak=False,
+        dispatch_uid="test_update_one_fast",
+    )
+    try:
+        # values only: a single UPDATE, the other fields are loaded when accessed
+        with CaptureQueriesContext(connection) as queries:
+            updated = Product.updateOne(
+                product.pk, {"name": "new"}, fast=True, signals=signals
+            )
+            assert updated.name == "new"
+        assert [query["sql"].split()[0] for query in queries] == ["UPDATE"]
+        assert updated.get_deferred_fields() >= {"sku", "price"}
+        assert (updated.sku, updated.price) == ("a", 5)
+
+        # an expression: the UPDATE, then its value and the fields that weren't set, in one query
+        with CaptureQueriesContext(connection) as queries:
+            updated = Product.updateOne(
+                product.pk,
+                {"name": "newer", "price": F("price") + 1},
+                fast=True,
+                signals=signals,
+            )
+            assert (updated.sku, updated.name, updated.price) == ("a", "newer", 6)
+            assert updated.date_created == product.date_created
+    finally:
+        post_save.disconnect(sender=Product, dispatch_uid="test_update_one_fast")
+    statements = [query["sql"].split()[0] for query in queries]
+    assert statements == ["UPDATE", "SELECT"]
+    columns = queries[1]["sql"].split(" FROM ")[0]
+    assert '"sku"' in columns and '"price"' in columns and '"name"' not in columns
+    assert saved == ([updated] * 2 if signals else [])
+    assert Product.objects.values_list("name", "price").get() == ("newer", 6)
+
+    with pytest.raises(Product.DoesNotExist):
+        Product.updateOne(uuid.uuid4(), {"name": "x"}, fast=True, signals=signals)
+
+
+def test_update_and_delete_missing_rows(db):
+    with pytest.raises(Product.DoesNotExist):
+        Product.updateOne(uuid.uuid4(), {"name": "x"})
+    for fast in (True, False):
+        with pytest.raises(Product.DoesNotExist):
+            Product.deleteOne(uuid.uuid4(), fast=fast)
+
+    product = Product.objects.create(sku="a")
+    Product.deleteOne(product.pk, fast=True)
+    assert not Product.objects.exists()
+
+
+@pytest.mark.parametrize("keyset", [False, True])
+def test_stream(db, keyset):
+    products = create_products()
+    cheap = Q(price__lt=2)
+    expected = sorted(p.pk for p in products if p.price < 2)
+
+    with CaptureQueriesContext(connection) as queries:
+        streamed = list(Product.stream(cheap, chunk_size=3, keyset=keyset))
+    assert all(isinstance(product, Product) for product in streamed)
+    assert sorted(product.pk for product in streamed) == expected
+    if keyset:
+        # 7 rows: chunks of 3, 3 and 1, in the order of the primary key
+        assert [product.pk for product in streamed] == expected
+        assert len(queries) == 3
+    else:
+        # a single query, read chunk by chunk
+        assert len(queries) == 1
+
+    rows = list(
+        Product.stream(cheap, chunk_size=3, fields=["sku", "price"], keyset=keyset)
+    )
+    assert sorted(rows) == sorted((p.sku, p.price) for p in products if p.price < 2)
+
+    # a last chunk that is full takes one more query to find the end
+    with CaptureQueriesContext(connection) as queries:
+        rows = list(Product.stream(Q(), chunk_size=5, fields=["sku"], keyset=keyset))
+    assert sorted(rows) == sorted((p.sku,) for p in products)
+    if keyset:
+        assert len(queries) == 3
+    assert list(Product.stream(Q(price=7), keyset=keyset)) == []
@@ -1,6 +1,17 @@
+import logging
 import pytest
 from django.db.models import Q
-from freeman.utils.query import makeQuery
+from freeman.utils.query import (
+    INDEXED_OPERATORS,
+    FilterPolicy,
+    QueryLimits,
+    QueryStructureError,
+    _indexed_fields,
+    makeQuery,
+    queryTemplate,
+    simplifyQuery,
+)
+from tests.testapp.models import Product, Tag
 
 # Test cases for makeQuery function
 test_cases = [
@@ -106,3 +117,216 @@ test_cases = [
 @pytest.mark.parametrize("query,expected", test_cases)
 def test_make_query(query, expected):
     assert makeQuery(query) == expected
+
+
+def test_make_query_reuses_templates():
+    queryTemplate.cache_clear()
+    assert makeQuery({"price": {"_gt": 10}, "tags": {"_in": [1, 2]}}) == Q(
+        price__gt=10, tags__in=[1, 2]
+    )
+    assert makeQuery({"price": {"_gt": 11}, "tags": {"_in": [3]}}) == Q(
+        price__gt=11, tags__in=[3]
+    )
+    assert queryTemplate.cache_info()[:2] == (1, 1)
+
+    # another shape is another template
+    makeQuery({"price": {"_gte": 10}})
+    assert queryTemplate.cache_info()[:2] == (1, 2)
+
+    assert makeQuery({"_eq": 5}, parent="a__b") == Q(a__b=5)
+
+    # the parent is part of the key
+    shape = (("b", ("_eq",)),)
+    assert queryTemplate(shape, "a").bind([5]) == Q(a__b=5)
+    assert queryTemplate(shape).bind([5]) == Q(b=5)
+    assert queryTemplate(shape, "") is queryTemplate(shape)
+    with pytest.raises(TypeError):
+        queryTemplate(shape, parent="a")
+
+
+def test_make_query_structure_errors():
+    with pytest.raises(QueryStructureError):
+        makeQuery({"a": "b"})
+    with pytest.raises(QueryStructureError):
+        makeQuery({"_or": [{"a": {"_eq": 1}}, "b"]})
+
+
+def test_make_query_deep_filters():
+    # nested deeper than the recursion limit
+    depth = 2000
+    query = {"_eq": 0}
+    for i in range(1, depth):
+        query = {"_and": [{"a": query}, {"b": {"_eq": i}}]}
+
+    paths = ["__".join(["a"] * (depth - i - 1) + ["b"]) for i in range(depth)]
+    expected = Q(("__".join(["a"] * (depth - 1)), 0), *zip(paths[1:], range(1, depth)))
+    assert makeQuery(query) == expected
+    unbounded = QueryLimits(max_depth=None, max_predicates=None, max_joins=None)
+    assert makeQuery(query, limits=unbounded) == expected
+    assert unbounded.check(query).depth == 2 * depth - 1
+    with pytest.raises(QueryStructureError, match="deeper"):
+        makeQuery(query, limits=QueryLimits())
+
+
+simplify_cases = [
+    # flattening and unwrapping
+    (Q(a=1) & (Q(b=2) & Q(c=3)), Q(a=1, b=2, c=3)),
+    (Q(Q(Q(a=1))), Q(a=1)),
+    # negations aren't folded without the model
+    (~(~Q(a=1) & ~Q(b=2)), ~(~Q(a=1) & ~Q(b=2))),
+    # duplicates
+    (Q(a=1) & Q(b=2) & Q(a=1), Q(a=1, b=2)),
+    (Q(a__in=[1]) | Q(a__in=[1]), Q(a__in=[1])),
+    (Q(a=1) & Q(a=True) & Q(a=1.0), Q(a=1) & Q(a=True) & Q(a=1.0)),
+    (Q(a__in=[1]) | Q(a__in=[True]), Q(a__in=[1]) | Q(a__in=[True])),
+    # equalities inside an OR
+    (Q(a=1) | Q(b=2) | Q(a__exact=3), Q(a__in=[1, 3]) | Q(b=2)),
+    (Q(a__b=1) | Q(a__b=2), Q(a__b__in=[1, 2])),
+    (Q(a__gt=1) | Q(a__gt=2), Q(a__gt=1) | Q(a__gt=2)),
+    (Q(a=None) | Q(a=1), Q(a=None) | Q(a=1)),
+    (Q(a=1) & Q(a=2), Q(a=1) & Q(a=2)),
+    # XOR is left alone
+    (Q(a=1) ^ Q(a=1), Q(a=1) ^ Q(a=1)),
+]
+
+
+@pytest.mark.parametrize("q,expected", simplify_cases)
+def test_simplify_query(q, expected):
+    assert simplifyQuery(q) == expected
+
+
+negation_cases = [
+    (~(~Q(price=1) & ~Q(name="b")), Q(price=1) | Q(name="b")),
+    (~Q(Q(price=1) & Q(name="b")), ~(Q(price=1) & Q(name="b"))),
+    (~(~Q(price=1) | ~Q(sku__in=["a"])), Q(price=1, sku__in=["a"])),
+    # lookups through a many-to-many relation are checked in their own subquery when negated
+    (
+        ~(~Q(tags__name="x") | ~Q(tags__name__in=["y"])) & Q(price=2),
+        ~(~Q(tags__name="x") | ~Q(tags__name__in=["y"])) & Q(price=2),
+    ),
+    (~Q(~Q(tags=1) & ~Q(price=1)), ~Q(~Q(tags=1) & ~Q(price=1))),
+    (
+        ~(Q(price=1) & (Q(tags=1) & Q(name="a"))),
+        ~(Q(price=1) & (Q(tags=1) & Q(name="a"))),
+    ),
+]
+
+
+@pytest.mark.parametrize("q,expected", negation_cases)
+def test_simplify_query_negations(q, expected):
+    assert simplifyQuery(q, Product) == expected
+
+
+def test_simplify_query_many_to_many(db):
+    x, y = Tag.objects.create(name="x"), Tag.objects.create(name="y")
+    both = Product.objects.create(sku="both", price=2)
+    both.tags.set([x, y])
+    Product.objects.create(sku="x", price=2).tags.set([x])
+    Product.objects.create(sku="none", price=2)
+
+    queries = [
+        # products with a tag x and a tag y, not a tag both x and y
+        ~(~Q(tags__name="x") | ~Q(tags__name__in=["y"])) & Q(price=2),
+        ~(~Q(tags__name="x") & ~Q(tags__name="y")),
+        ~(~Q(tags=x) | ~Q(tags=y)),
+        ~Q(~Q(tags__name="x")) & Q(tags__name="y"),
+    ]
+    for q in queries:
+        expected = set(Product.objects.filter(q).values_list("sku", flat=True))
+        assert expected
+        for model in (None, Product):
+            simplified = Product.objects.filter(simplifyQuery(q, model))
+            assert set(simplified.values_list("sku", flat=True)) == expected
+
+
+def test_make_query_simplify():
+    query = {"field1": {"_or": [{"_eq": 1}, {"_eq": 2}, {"_eq": 1}]}}
+    assert makeQuery(query) == Q(field1=1) | Q(field1=2) | Q(field1=1)
+    assert makeQuery(query, simplify=True) == Q(field1__in=[1, 2])
+    assert makeQuery({"_not": [{"a": {"_neq": 7}}]}, simplify=True) == Q(a=7)
+    query = {"_not": [{"price": {"_neq": 1}}, {"name": {"_neq": "b"}}]}
+    assert makeQuery(query, simplify=True) == ~(~Q(price=1) & ~Q(name="b"))
+    policy = FilterPolicy(Product, on_unindexed="allow")
+    assert makeQuery(query, simplify=True, policy=policy) == Q(price=1) | Q(name="b")
+
+
+def test_query_limits():
+    limits = QueryLimits(
+        max_depth=3,
+        max_predicates=3,
+        max_in_size=2,
+        max_joins=1,
+        allowed={"_icontains": ["name"]},
+    )
+    assert limits.check({"a": {"b": {"_eq": 1}}, "c": {"_in": [1, 2]}}) == (
+        3,
+        2,
+        1,
+        1 + 2 + 1 + 2 * 0.01,
+    )
+    assert makeQuery({"name": {"_icontains": "ab"}}, limits=limits) == Q(
+        name__icontains="ab"
+    )
+
+    rejected = [
+        {"a": {"b": {"c": {"_eq": 1}}}},  # too deep
+        {"_or": [{"a": {"_eq": i}} for i in range(4)]},  # too many criteria
+        {"a": {"_in": [1, 2, 3]}},  # too many values
+        {"a__b__c": {"_eq": 1}},  # too many joins
+        {"name": {"_regex": "^a"}},  # not allowed
+        {"title": {"_icontains": "a"}},  # not allowed on this field
+    ]
+    for query in rejected:
+        with pytest.raises(QueryStructureError):
+            makeQuery(query, limits=limits)
+
+    expensive = QueryLimits(max_cost=10, costs={"_gt": 6})
+    expensive.check({"a": {"_gt": 1}})
+    with pytest.raises(QueryStructureError, match="expensive"):
+        expensive.check({"a": {"_gt": 1}, "b": {"_gt": 1}})
+
+
+def test_filter_policy():
+    assert _indexed_fields(Product) == {"id", "sku", "name", "price", "date_created"}
+
+    policy = FilterPolicy(Product)
+    for path in ("id", "sku", "name", "price", "date_created", "tags", "tags__id"):
+        assert policy.paths[path] == INDEXED_OPERATORS
+    for path in ("last_updated", "attributes", "tags__name"):
+        assert policy.paths[path] == frozenset()
+
+    policy.check({"sku": {"_in": ["a"]}, "price": {"_gte": 1}, "tags": {"_eq": 1}})
+    policy.check({"name": {"_eq": "a"}, "date_created": {"_lt": "2024-01-01"}})
+    rejected = [
+        {"attributes": {"_eq": {}}},  # no index
+        {"name": {"_icontains": "a"}},  # an operator no index serves
+        {"tags": {"name": {"_eq": "x"}}},
+        {"stock": {"_eq": 1}},  # not a field
+        {"tags__name__id": {"_eq": 1}},  # too many joins
+    ]
+    for query in rejected:
+        with pytest.raises(QueryStructureError):
+            policy.check(query)
+
+    narrowed = FilterPolicy(
+        Product,
+        fields=["sku", "name", "tags__name"],
+        exclude=["name"],
+        indexed=["tags__name"],
+        max_joins=0,
+    )
+    assert set(narrowed.paths) == {"sku"}
+    narrowed = FilterPolicy(Product, exclude=["name"], indexed=["tags__name"])
+    narrowed.check({"tags": {"name": {"_icontains": "x"}}})
+    with pytest.raises(QueryStructureError, match="can't be filtered"):
+        narrowed.check({"name": {"_eq": "a"}})
+
+
+def test_filter_policy_unindexed(caplog):
+    query = {"price": {"_eq": 1}, "attributes": {"_eq": {}}}
+    FilterPolicy(Product, on_unindexed="allow").check(query)
+    with caplog.at_level(logging.WARNING, logger="freeman.utils.query"):
+        FilterPolicy(Product, on_unindexed="warn").check(query)
+    assert "Product filter on attributes _eq can't use an index" in caplog.text
+    with pytest.raises(ValueError):
+        FilterPolicy(Product, on_unindexed="ignore")
@@ -0,0 +1,21 @@
+from django.db import models
+from freeman.models.abstract import AbstractSharedModel
+
+
+class Tag(models.Model):
+    # compared case-insensitively by the database
+    name = models.CharField(max_length=50, db_collation="NOCASE")
+
+
+class Product(AbstractSharedModel):
+    sku = models.CharField(max_length=20, unique=True)
+    name = models.CharField(max_length=50, default="", db_index=True)
+    price = models.IntegerField(default=0)
+    attributes = models.JSONField(default=dict)
+    tags = models.ManyToManyField(Tag)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["date_created", "id"]),
+            models.Index(fields=["price", "name"]),
+        ]